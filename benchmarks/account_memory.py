@@ -0,0 +1,72 @@
+"""
+Сравнение памяти и скорости создания GoogleAccount и CompactGoogleAccount.
+
+    python benchmarks/account_memory.py [количество аккаунтов]
+"""
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# Пакет берется из репозитория, даже если не установлен
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from better_automation.google.account import GoogleAccount, CompactGoogleAccount
+
+
+def make_cookies(index: int) -> list[dict]:
+    names = ("SID", "HSID", "SSID", "APISID", "SAPISID", "NID", "__Secure-1PSID", "__Secure-3PSID")
+    return [
+        {
+            "name": name,
+            "value": f"{name}-{index}-" + "x" * 60,
+            "domain": ".google.com",
+            "path": "/",
+            "expires": 1_800_000_000 + index,
+            "httpOnly": True,
+            "secure": True,
+            "sameSite": "None",
+        }
+        for name in names
+    ]
+
+
+def create_accounts(account_class: type, count: int, with_cookies: bool) -> list:
+    return [
+        account_class(
+            email=f"user{index}@gmail.com",
+            password=f"password{index}",
+            cookies=make_cookies(index) if with_cookies else None,
+        )
+        for index in range(count)
+    ]
+
+
+def measure(account_class: type, count: int, with_cookies: bool) -> tuple[float, float]:
+    """
+    :return: байт на аккаунт (вместе с cookies), микросекунд на создание аккаунта
+    """
+    start_time = time.perf_counter()
+    create_accounts(account_class, count, with_cookies)
+    elapsed = time.perf_counter() - start_time
+
+    tracemalloc.start()
+    accounts = create_accounts(account_class, count, with_cookies)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(accounts) == count
+    return current / count, elapsed / count * 1_000_000
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    for with_cookies in (False, True):
+        print(f"{count} accounts {'with' if with_cookies else 'without'} cookies")
+        for account_class in (GoogleAccount, CompactGoogleAccount):
+            bytes_per_account, us_per_account = measure(account_class, count, with_cookies)
+            print(f"{account_class.__name__:>22}: {bytes_per_account:8.0f} B/account,"
+                  f" {us_per_account:6.1f} us/account")
+
+
+if __name__ == "__main__":
+    main()
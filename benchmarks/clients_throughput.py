@@ -0,0 +1,128 @@
+"""
+Пропускная способность SmshubClient и GoogleAPIsClient на локальных заглушках (mock_servers.py).
+
+    python benchmarks/clients_throughput.py --tasks 2000 --latency 0.05 --error-rate 0.05
+
+Каждая задача - отдельный клиент:
+    - smshub: покупка номера, ожидание кода через getStatus, подтверждение активации;
+    - googleapis: createAuthUri, signInWithIdp, accounts:lookup, обновление токена.
+Выводит запросов в секунду, задержки каждого запроса (better_automation.metrics) и исходы задач.
+"""
+import argparse
+import asyncio
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+# Пакет берется из репозитория, даже если не установлен
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from better_automation.googleapis import GoogleAPIsClient
+from better_automation.googleapis.retry import CircuitBreaker
+from better_automation.metrics import Metrics, span
+from better_automation.sessions import SessionPool
+from better_automation.smshub import SmshubClient
+
+from mock_servers import MockGoogleAPIsServer, MockSmshubServer
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+async def smshub_task(server: MockSmshubServer, session_pool: SessionPool | None, metrics: Metrics,
+                      args: argparse.Namespace):
+    async with SmshubClient("mock-key", session_pool=session_pool, metrics=metrics) as smshub:
+        smshub.BASE_API_URL = server.api_url
+        id, number = await smshub.request_number("go", 6)
+        while True:
+            status = await smshub.request_status(id)
+            if status.startswith("STATUS_OK"):
+                break
+            await asyncio.sleep(args.poll_interval)
+        await smshub.confirm_activation(id)
+
+
+async def googleapis_task(server: MockGoogleAPIsServer, session_pool: SessionPool | None, metrics: Metrics,
+                          circuit_breakers: dict[str, CircuitBreaker], args: argparse.Namespace):
+    async with GoogleAPIsClient(
+            "mock-key",
+            max_retries=args.max_retries,
+            backoff_base=args.backoff_base,
+            circuit_breakers=circuit_breakers,
+            session_pool=session_pool,
+    ) as googleapis:
+        for name, url in server.client_urls().items():
+            setattr(googleapis, name, url)
+        with span(metrics, "googleapis.createAuthUri"):
+            auth_uri, session_id = await googleapis.request_auth_data("google.com", "https://app.example.com")
+        with span(metrics, "googleapis.signInWithIdp"):
+            data, auth_token = await googleapis.sign_in(auth_uri, session_id)
+        with span(metrics, "googleapis.lookup"):
+            await googleapis.request_account_info(auth_token.auth_token)
+        with span(metrics, "googleapis.token"):
+            await googleapis.refresh_auth_token(auth_token.refresh_token)
+
+
+async def run(name: str, server, task_factory, args: argparse.Namespace):
+    outcomes = Counter()
+
+    async def task():
+        try:
+            await task_factory()
+        except Exception as exc:
+            outcomes[type(exc).__name__] += 1
+        else:
+            outcomes["ok"] += 1
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(task() for _ in range(args.tasks)))
+    elapsed = time.perf_counter() - start_time
+
+    requests = sum(server.requests.values())
+    print(f"{name}: {args.tasks} tasks, {requests} requests in {elapsed:.2f}s,"
+          f" {requests / elapsed:.0f} requests/s, {args.tasks / elapsed:.0f} tasks/s")
+    print(f"  outcomes: {dict(outcomes.most_common())}")
+    print(f"  responses: {dict(server.responses.most_common())}")
+
+
+async def main(args: argparse.Namespace):
+    server_kwargs = {"latency": args.latency, "error_rate": args.error_rate, "seed": args.seed}
+    session_pool = None if args.no_session_pool else SessionPool(max_clients=args.max_clients)
+    metrics = Metrics(buckets=BUCKETS)
+
+    try:
+        async with MockSmshubServer(code_delay=args.code_delay, no_numbers_rate=args.no_numbers_rate,
+                                    **server_kwargs) as server:
+            await run("smshub", server, lambda: smshub_task(server, session_pool, metrics, args), args)
+
+        circuit_breakers = {}
+        async with MockGoogleAPIsServer(throttle_rate=args.throttle_rate, **server_kwargs) as server:
+            await run("googleapis", server,
+                      lambda: googleapis_task(server, session_pool, metrics, circuit_breakers, args), args)
+    finally:
+        if session_pool is not None:
+            session_pool.close()
+
+    print()
+    print(metrics)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=1000, help="Одновременных задач на каждый клиент")
+    parser.add_argument("--latency", type=float, default=0.02, help="Задержка ответа заглушки, с")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Доля ответов ERROR_SQL / 503")
+    parser.add_argument("--no-numbers-rate", type=float, default=0.0, help="Доля ответов NO_NUMBERS")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Доля ответов 429 googleapis")
+    parser.add_argument("--code-delay", type=float, default=0.5, help="Через сколько приходит SMS код, с")
+    parser.add_argument("--poll-interval", type=float, default=0.1, help="Интервал getStatus, с")
+    parser.add_argument("--max-retries", type=int, default=3)
+    parser.add_argument("--backoff-base", type=float, default=0.05)
+    parser.add_argument("--max-clients", type=int, default=100, help="Соединений на сессию SessionPool")
+    parser.add_argument("--no-session-pool", action="store_true", help="Отдельная сессия на каждый клиент")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,298 @@
+"""
+Локальная подмена страниц входа Google для бенчмарков GooglePlaywrightBrowserContext.
+
+Страницы воспроизводят только ту разметку, на которую опирается GooglePlaywrightBrowserContext
+(XPath полей и кнопок, iframe reCAPTCHA, URL страниц recovery, passkey, idvreenable, myaccount и OAuth2).
+Запросы отдаются через Playwright routing контекста: адреса https://accounts.google.com и т. п. остаются настоящими,
+поэтому URL паттерны библиотеки работают без подмены DNS и TLS сертификатов.
+Все остальные хосты (например, redirect_uri) получают пустую страницу, в сеть ничего не уходит.
+"""
+import asyncio
+import html
+import json
+import random
+from dataclasses import dataclass, field
+from itertools import count
+
+from playwright.async_api import BrowserContext, Request, Route
+from yarl import URL
+
+
+ACCOUNTS_URL = "https://accounts.google.com"
+MY_ACCOUNT_URL = "https://myaccount.google.com/"
+RECAPTCHA_URL = "https://www.google.com/recaptcha/api2/anchor"
+RECAPTCHA_SITEKEY = "6LfakeAAAAAAAFakeGoogleSignInSiteKey000"
+
+# Шаг сценария входа -> путь страницы на accounts.google.com
+STEP_PATHS = {
+    "password": "/v3/signin/challenge/pwd",
+    "captcha": "/v3/signin/challenge/recaptcha",
+    "recovery_email": "/v3/signin/challenge/selection",
+    "recovery_required": "/v3/signin/rejected",
+    "verify_on_device": "/v3/signin/challenge/dp",
+    "passkey": "/signin/v2/passkeyenrollment",
+    "phone_verification": "/speedbump/idvreenable",
+}
+RECOVERY_EMAIL_INPUT_PATH = "/v3/signin/challenge/kpe"
+
+# Необязательные проверки в порядке их появления в сценарии. Пароль спрашивается всегда
+OPTIONAL_STEPS = ("captcha", "password", "recovery_email", "phone_verification", "passkey")
+# Проверки, на которых сценарий заканчивается неудачей
+TERMINAL_STEPS = ("recovery_required", "verify_on_device")
+
+DEFAULT_LATENCIES = {
+    "page": 0.2,  # Любая страница
+    "captcha_solving": 2.0,  # Через сколько после открытия капча отмечается решенной (без решателя)
+}
+
+_PAGE_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title></head>
+<body>
+{body}
+<script>
+function go(url) {{ location.href = url; }}
+</script>
+</body></html>
+"""
+_RIGHT_BUTTON = '<div jsname="Njthtb"><div><button type="button" onclick="{onclick}">Next</button></div></div>'
+_LEFT_BUTTON = '<div jsname="QkNstf"><div><div><button type="button" onclick="{onclick}">{text}</button></div></div></div>'
+_RECAPTCHA_FRAME = """<!DOCTYPE html>
+<html><body>
+<span id="checkbox" class="recaptcha-checkbox"></span>
+<script>
+setTimeout(() => document.getElementById("checkbox").classList.add("recaptcha-checkbox-checked"), {delay});
+</script>
+</body></html>
+"""
+
+
+def _go(url: str) -> str:
+    return html.escape(f"go({json.dumps(url)})")
+
+
+@dataclass
+class SignInFlow:
+    email: str
+    steps: list[str] = field(default_factory=list)
+
+    def step_url(self, flow_id: int, index: int) -> str:
+        if index >= len(self.steps):
+            return str(URL(MY_ACCOUNT_URL).with_query(flow=flow_id))
+        path = STEP_PATHS[self.steps[index]]
+        return str(URL(ACCOUNTS_URL + path).with_query(flow=flow_id, step=index))
+
+
+class FakeGoogleSignIn:
+    """
+    Подменяет страницы входа и OAuth2 в контексте Playwright.
+
+    Пример:
+        fake_google = FakeGoogleSignIn(challenges={"captcha": 0.3, "passkey": 0.1})
+        async with browser.new_context() as context:
+            await fake_google.install(context)
+            await GooglePlaywrightBrowserContext(context, account).login()
+    """
+
+    def __init__(
+            self,
+            *,
+            challenges: dict[str, float] = None,
+            latencies: dict[str, float] = None,
+            jitter: float = 0.5,
+            oauth2_consent: float = 1.0,
+            seed: int = 0,
+    ):
+        """
+        :param challenges: Вероятность каждой проверки из OPTIONAL_STEPS и TERMINAL_STEPS (кроме пароля).
+        :param latencies: Задержки в секундах: "page" для всех страниц, имя шага для конкретной страницы
+         и "captcha_solving" для решения капчи.
+        :param jitter: Задержки умножаются на случайное число из [1 - jitter, 1 + jitter].
+        :param oauth2_consent: Вероятность того, что после выбора аккаунта будет показана страница согласия.
+        :param seed: Сценарий аккаунта определяется seed и email, поэтому прогоны воспроизводимы.
+        """
+        unknown_challenges = set(challenges or ()) - set(OPTIONAL_STEPS) - set(TERMINAL_STEPS)
+        if unknown_challenges:
+            raise ValueError(f"Unknown challenges: {', '.join(sorted(unknown_challenges))}")
+
+        self.challenges = {"password": 1.0, **(challenges or {})}
+        self.latencies = {**DEFAULT_LATENCIES, **(latencies or {})}
+        self.jitter = jitter
+        self.oauth2_consent = oauth2_consent
+        self.seed = seed
+        self._flows: dict[int, SignInFlow] = {}
+        self._flow_ids = count(1)
+        self._random = random.Random(seed)
+        self._handlers = {
+            ("accounts.google.com", "/ServiceLogin"): self._identifier_page,
+            ("accounts.google.com", "/signin/identifier"): self._identifier_submit,
+            ("accounts.google.com", STEP_PATHS["password"]): self._password_page,
+            ("accounts.google.com", STEP_PATHS["captcha"]): self._captcha_page,
+            ("accounts.google.com", STEP_PATHS["recovery_email"]): self._recovery_email_page,
+            ("accounts.google.com", RECOVERY_EMAIL_INPUT_PATH): self._recovery_email_input_page,
+            ("accounts.google.com", STEP_PATHS["recovery_required"]): self._recovery_required_page,
+            ("accounts.google.com", STEP_PATHS["verify_on_device"]): self._verify_on_device_page,
+            ("accounts.google.com", STEP_PATHS["passkey"]): self._passkey_page,
+            ("accounts.google.com", STEP_PATHS["phone_verification"]): self._phone_verification_page,
+            ("accounts.google.com", "/o/oauth2/v2/auth"): self._oauth2_chooser_page,
+            ("accounts.google.com", "/o/oauth2/v2/consent"): self._oauth2_consent_page,
+            ("myaccount.google.com", "/"): self._my_account_page,
+            ("www.google.com", "/recaptcha/api2/anchor"): self._recaptcha_frame,
+        }
+
+    def make_flow(self, email: str) -> SignInFlow:
+        """
+        Сценарий входа аккаунта: идентификатор, затем проверки из challenges.
+        """
+        rng = random.Random(f"{self.seed}:{email.lower()}")
+        flow = SignInFlow(email=email.lower())
+        for step in OPTIONAL_STEPS:
+            if rng.random() < self.challenges.get(step, 0):
+                flow.steps.append(step)
+        for step in TERMINAL_STEPS:
+            if rng.random() < self.challenges.get(step, 0):
+                flow.steps.append(step)
+                break
+        return flow
+
+    async def install(self, context: BrowserContext):
+        await context.route("**/*", self._route)
+
+    def _latency(self, name: str) -> float:
+        latency = self.latencies.get(name, self.latencies["page"])
+        return latency * self._random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    async def _route(self, route: Route, request: Request):
+        url = URL(request.url)
+        handler = self._handlers.get((url.host, url.path))
+        if handler is None:
+            # redirect_uri и все прочее
+            await route.fulfill(status=200, content_type="text/html", body="<html><body></body></html>")
+            return
+
+        name, body, headers = await handler(url, request)
+        await asyncio.sleep(self._latency(name))
+        await route.fulfill(status=200, content_type="text/html", headers=headers, body=body)
+
+    def _flow(self, url: URL) -> tuple[int, SignInFlow, int]:
+        flow_id = int(url.query["flow"])
+        return flow_id, self._flows[flow_id], int(url.query.get("step", 0))
+
+    def _next_url(self, url: URL) -> str:
+        flow_id, flow, index = self._flow(url)
+        return flow.step_url(flow_id, index + 1)
+
+    @staticmethod
+    def _page(title: str, body: str) -> str:
+        return _PAGE_TEMPLATE.format(title=title, body=body)
+
+    # Sign in
+
+    async def _identifier_page(self, url: URL, request: Request):
+        body = """
+<input id="identifierId" type="email" name="identifier">
+<div id="identifierNext"><div><button type="button" onclick="go('/signin/identifier?email=' + encodeURIComponent(document.getElementById('identifierId').value))">Next</button></div></div>
+"""
+        return "identifier", self._page("Sign in", body), {}
+
+    async def _identifier_submit(self, url: URL, request: Request):
+        flow_id = next(self._flow_ids)
+        flow = self._flows[flow_id] = self.make_flow(url.query["email"])
+        next_url = flow.step_url(flow_id, 0)
+        # Сразу отдаем первую страницу сценария, не дожидаясь отдельного перехода
+        body = f'<script>location.replace({json.dumps(next_url)})</script>'
+        return "identifier", self._page("Sign in", body), {}
+
+    async def _password_page(self, url: URL, request: Request):
+        body = f"""
+<div id="password"><div><div><div><input type="password" name="Passwd"></div></div></div></div>
+<div id="passwordNext"><div><button type="button" onclick="{_go(self._next_url(url))}">Next</button></div></div>
+"""
+        return "password", self._page("Welcome", body), {}
+
+    async def _captcha_page(self, url: URL, request: Request):
+        delay = round(self._latency("captcha_solving") * 1000)
+        frame_url = str(URL(RECAPTCHA_URL).with_query(k=RECAPTCHA_SITEKEY, delay=delay))
+        body = (f'<iframe title="reCAPTCHA" name="a-fake" src="{html.escape(frame_url)}"></iframe>\n'
+                '<textarea id="g-recaptcha-response" name="g-recaptcha-response" hidden></textarea>\n'
+                + _RIGHT_BUTTON.format(onclick=_go(self._next_url(url))))
+        return "captcha", self._page("Verify it's you", body), {}
+
+    async def _recaptcha_frame(self, url: URL, request: Request):
+        return "recaptcha", _RECAPTCHA_FRAME.format(delay=int(url.query.get("delay", 0))), {}
+
+    async def _recovery_email_page(self, url: URL, request: Request):
+        input_url = str(url.with_path(RECOVERY_EMAIL_INPUT_PATH).with_query(url.query))
+        body = f'<div data-challengeid="5" onclick="{_go(input_url)}">Confirm your recovery email</div>'
+        return "recovery_email", self._page("Verify it's you", body), {}
+
+    async def _recovery_email_input_page(self, url: URL, request: Request):
+        body = ('<input id="knowledge-preregistered-email-response" type="email">\n'
+                + _RIGHT_BUTTON.format(onclick=_go(self._next_url(url))))
+        return "recovery_email", self._page("Verify it's you", body), {}
+
+    async def _recovery_required_page(self, url: URL, request: Request):
+        body = '<div id="accountRecoveryButton"><div><div><a href="#">Continue</a></div></div></div>'
+        return "recovery_required", self._page("Couldn't sign you in", body), {}
+
+    async def _verify_on_device_page(self, url: URL, request: Request):
+        body = _LEFT_BUTTON.format(onclick="", text="Try another way")
+        return "verify_on_device", self._page("Verify it's you", body), {}
+
+    async def _passkey_page(self, url: URL, request: Request):
+        body = _LEFT_BUTTON.format(onclick=_go(self._next_url(url)), text="Not now")
+        return "passkey", self._page("Simplify your sign-in", body), {}
+
+    async def _phone_verification_page(self, url: URL, request: Request):
+        # Первое нажатие Next показывает поле для кода, второе - переходит дальше
+        onclick = html.escape(f"const code = document.getElementById('code');"
+                              f" if (code.hidden) code.hidden = false; else go({json.dumps(self._next_url(url))});")
+        body = f"""
+<select id="countryList"><option value="US">United States</option><option value="ID">Indonesia</option></select>
+<input id="deviceAddress" type="tel">
+<div id="code" hidden><input id="smsUserPin" type="text"></div>
+<button id="next-button" type="button" onclick="{onclick}">Next</button>
+"""
+        return "phone_verification", self._page("Verify your phone number", body), {}
+
+    async def _my_account_page(self, url: URL, request: Request):
+        headers = {}
+        if "flow" in url.query:
+            flow = self._flows.pop(int(url.query["flow"]), None)
+            if flow:
+                headers["set-cookie"] = "\n".join(
+                    f"{name}=fake:{flow.email}; Domain=.google.com; Path=/; Secure; Max-Age=31536000"
+                    for name in ("SID", "HSID", "SSID", "APISID", "SAPISID")
+                )
+        return "my_account", self._page("Google Account", "<h1>Welcome</h1>"), headers
+
+    # OAuth2
+
+    @staticmethod
+    async def _cookie_email(request: Request) -> str | None:
+        cookie_header = await request.header_value("cookie") or ""
+        for cookie in cookie_header.split(";"):
+            name, _, value = cookie.strip().partition("=")
+            if name == "SID" and value.startswith("fake:"):
+                return value.removeprefix("fake:")
+        return None
+
+    def _redirect_url(self, url: URL) -> str:
+        code = f"4/fake-{self._random.getrandbits(64):016x}"
+        return str(URL(url.query["redirect_uri"]).update_query(code=code, scope=url.query.get("scope", "")))
+
+    async def _oauth2_chooser_page(self, url: URL, request: Request):
+        email = await self._cookie_email(request)
+        if email is None:
+            body = "<h1>Sign in required</h1>"
+        else:
+            if self._random.random() < self.oauth2_consent:
+                next_url = str(url.with_path("/o/oauth2/v2/consent").with_query(url.query))
+            else:
+                next_url = self._redirect_url(url)
+            body = f'<div data-identifier="{html.escape(email)}" onclick="{_go(next_url)}">{html.escape(email)}</div>'
+        return "oauth2_chooser", self._page("Choose an account", body), {}
+
+    async def _oauth2_consent_page(self, url: URL, request: Request):
+        body = (f'<div jsname="uRHG6"><div><button type="button" onclick="{_go(self._redirect_url(url))}">'
+                f'Continue</button></div></div>')
+        return "oauth2_consent", self._page("Sign in to app", body), {}
@@ -0,0 +1,101 @@
+"""
+Время импорта и защита от регрессий ленивых импортов.
+
+    python benchmarks/import_time.py [--repeat 5] [--budget-ms 600]
+
+Каждый сценарий запускается в отдельном чистом интерпретаторе.
+Скрипт завершается с кодом 1, если сценарий загрузил запрещенные модули
+(например, Playwright при импорте SmshubClient) или медиана времени превысила бюджет.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# yarl не проверяется: его загружает и tweepy-self, на котором основаны все HTTP клиенты
+GOOGLE_BROWSER_MODULES = (
+    "playwright",
+    "playwright_stealth",
+    "better_automation.playwright_",
+    "better_automation.google.browser",
+)
+
+# Сценарий: код импорта, модули, которые он не должен загружать
+SCENARIOS = {
+    "import better_automation": (
+        "import better_automation",
+        ("better_automation.google", "better_automation.googleapis", "better_automation.smshub",
+         "twitter", "curl_cffi", *GOOGLE_BROWSER_MODULES),
+    ),
+    "SmshubClient": (
+        "from better_automation.smshub import SmshubClient",
+        ("better_automation.google", "better_automation.googleapis", *GOOGLE_BROWSER_MODULES),
+    ),
+    "GoogleAPIsClient": (
+        "from better_automation.googleapis import GoogleAPIsClient",
+        ("better_automation.google", "better_automation.smshub", *GOOGLE_BROWSER_MODULES),
+    ),
+    "GoogleAccount": (
+        "from better_automation.google import GoogleAccount",
+        GOOGLE_BROWSER_MODULES,
+    ),
+    "GooglePlaywrightBrowserContext": (
+        "from better_automation.google import GooglePlaywrightBrowserContext",
+        (),
+    ),
+}
+
+_PROBE = """
+import sys, time, json
+start_time = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - start_time
+print(json.dumps({{"elapsed": elapsed, "modules": sorted(sys.modules)}}))
+"""
+
+
+def probe(code: str) -> tuple[float, set[str]]:
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(code=code)],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stdout
+    result = json.loads(output.splitlines()[-1])
+    return result["elapsed"], set(result["modules"])
+
+
+def loaded(modules: set[str], forbidden: str) -> bool:
+    return forbidden in modules or any(module.startswith(forbidden + ".") for module in modules)
+
+
+def main(args: argparse.Namespace) -> int:
+    failed = False
+    for name, (code, forbidden_modules) in SCENARIOS.items():
+        timings = []
+        for _ in range(args.repeat):
+            elapsed, modules = probe(code)
+            timings.append(elapsed)
+        median = statistics.median(timings) * 1000
+
+        problems = [f"loads {module}" for module in forbidden_modules if loaded(modules, module)]
+        if args.budget_ms and median > args.budget_ms and forbidden_modules:
+            problems.append(f"slower than {args.budget_ms:.0f} ms")
+        failed = failed or bool(problems)
+        status = "FAIL: " + ", ".join(problems) if problems else "ok"
+        print(f"{name:<34} {median:8.1f} ms  {len(modules):5} modules  {status}")
+    return 1 if failed else 0
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="Запусков на сценарий, берется медиана")
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="Бюджет времени для сценариев с ограничениями на модули")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    sys.exit(main(parse_args()))
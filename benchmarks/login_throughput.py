@@ -0,0 +1,192 @@
+"""
+Пропускная способность login() и oauth2() на локальной подмене страниц Google (fake_google.py).
+
+    python benchmarks/login_throughput.py --accounts 100 --concurrency 10 --captcha 0.2 --oauth2
+
+Выводит аккаунтов в минуту, p50/p95 каждого шага (better_automation.metrics) и RSS процессов браузера на контекст.
+RSS считается по /proc, поэтому доступен только на Linux.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+# Пакет берется из репозитория, даже если не установлен
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from better_automation.captcha import CaptchaQueue, FakeCaptchaSolver
+from better_automation.google import GooglePlaywrightBrowserContext, GoogleAccount
+from better_automation.metrics import Metrics
+from better_automation.playwright_ import BasePlaywrightBrowser
+
+from fake_google import FakeGoogleSignIn, OPTIONAL_STEPS, TERMINAL_STEPS
+
+OAUTH2_PARAMS = {
+    "client_id": "1234567890-fake.apps.googleusercontent.com",
+    "redirect_uri": "https://app.example.com/oauth2/callback",
+    "scope": "https://www.googleapis.com/auth/userinfo.email",
+    "prompt": "consent",
+}
+BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 1.5, 2, 3, 5, 7.5, 10, 15, 20, 30, 60)
+
+
+def _children() -> dict[int, list[int]]:
+    children = {}
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat") as file:
+                # Имя процесса может содержать пробелы и скобки, поэтому поля берутся после последней ")"
+                ppid = int(file.read().rpartition(")")[2].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(ppid, []).append(int(name))
+    return children
+
+
+def descendants_rss(pid: int = None) -> int | None:
+    """
+    Суммарный RSS всех потомков процесса (драйвер Playwright и процессы браузера) в байтах.
+    """
+    if not os.path.isdir("/proc"):
+        return None
+    children = _children()
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    rss = 0
+    stack = list(children.get(pid or os.getpid(), ()))
+    while stack:
+        child = stack.pop()
+        stack.extend(children.get(child, ()))
+        try:
+            with open(f"/proc/{child}/statm") as file:
+                rss += int(file.read().split()[1]) * page_size
+        except (OSError, ValueError, IndexError):
+            continue
+    return rss
+
+
+class RSSSampler:
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.baseline: int | None = None
+        self.peak: int = 0
+        self._task: asyncio.Task | None = None
+
+    async def _sample(self):
+        while True:
+            self.peak = max(self.peak, descendants_rss() or 0)
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        self.baseline = descendants_rss()
+        self._task = asyncio.create_task(self._sample())
+
+    async def stop(self):
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+
+
+async def process(
+        browser: BasePlaywrightBrowser,
+        fake_google: FakeGoogleSignIn,
+        account: GoogleAccount,
+        metrics: Metrics,
+        captcha_queue: CaptchaQueue | None,
+        args: argparse.Namespace,
+) -> str:
+    """
+    :return: Статус аккаунта или имя исключения.
+    """
+    try:
+        async with browser.new_context() as context:
+            await fake_google.install(context)
+            google = GooglePlaywrightBrowserContext(
+                context,
+                account,
+                time_to_wait=args.time_to_wait,
+                block_resources=args.block_resources,
+                metrics=metrics,
+                captcha_queue=captcha_queue,
+            )
+            await google.login()
+            if args.oauth2:
+                await google.oauth2(**OAUTH2_PARAMS)
+    except Exception as exc:
+        return f"{account.status} ({type(exc).__name__})"
+    return str(account.status)
+
+
+async def main(args: argparse.Namespace):
+    fake_google = FakeGoogleSignIn(
+        challenges={step: getattr(args, step) for step in (*OPTIONAL_STEPS, *TERMINAL_STEPS) if step != "password"},
+        latencies={"page": args.page_latency, "captcha_solving": args.captcha_latency},
+        seed=args.seed,
+    )
+    accounts = [
+        GoogleAccount(
+            email=f"user{index}@gmail.com",
+            password=f"password{index}",
+            recovery_email=f"recovery{index}@gmail.com",
+        )
+        for index in range(args.accounts)
+    ]
+    metrics = Metrics(buckets=BUCKETS)
+    outcomes = Counter()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    rss_sampler = RSSSampler()
+    captcha_queue = None
+    if args.captcha_solver_delay is not None:
+        captcha_queue = CaptchaQueue(FakeCaptchaSolver(delay=args.captcha_solver_delay, seed=args.seed))
+
+    async def worker(account: GoogleAccount):
+        async with semaphore:
+            outcomes[await process(browser, fake_google, account, metrics, captcha_queue, args)] += 1
+
+    async with BasePlaywrightBrowser(headless=not args.headed) as browser:
+        rss_sampler.start()
+        start_time = time.perf_counter()
+        await asyncio.gather(*(worker(account) for account in accounts))
+        elapsed = time.perf_counter() - start_time
+        await rss_sampler.stop()
+    if captcha_queue is not None:
+        await captcha_queue.close()
+
+    print(f"{args.accounts} accounts, concurrency {args.concurrency}: {elapsed:.1f}s,"
+          f" {args.accounts / elapsed * 60:.1f} accounts/min")
+    for outcome, number in outcomes.most_common():
+        print(f"  {outcome}: {number}")
+    print()
+    print(metrics)
+    if rss_sampler.baseline is not None:
+        print()
+        rss_per_context = (rss_sampler.peak - rss_sampler.baseline) / min(args.concurrency, args.accounts)
+        print(f"RSS: baseline {rss_sampler.baseline / 2 ** 20:.0f} MiB, peak {rss_sampler.peak / 2 ** 20:.0f} MiB,"
+              f" ~{rss_per_context / 2 ** 20:.1f} MiB per context")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--accounts", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--oauth2", action="store_true", help="После входа получать OAuth2 код")
+    parser.add_argument("--block-resources", action="store_true")
+    parser.add_argument("--headed", action="store_true")
+    parser.add_argument("--time-to-wait", type=int, default=10_000, help="time_to_wait контекста, мс")
+    parser.add_argument("--page-latency", type=float, default=0.2, help="Задержка ответа страницы, с")
+    parser.add_argument("--captcha-latency", type=float, default=2.0, help="Время решения капчи, с")
+    parser.add_argument("--captcha-solver-delay", type=float, default=None,
+                        help="Решать капчу через CaptchaQueue с FakeCaptchaSolver с этой задержкой, с")
+    parser.add_argument("--seed", type=int, default=0)
+    for step in (*OPTIONAL_STEPS, *TERMINAL_STEPS):
+        if step != "password":
+            parser.add_argument(f"--{step.replace('_', '-')}", type=float, default=0.0,
+                                help=f"Вероятность проверки {step}")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,323 @@
+"""
+Локальные заглушки smshub и googleapis (identitytoolkit, securetoken) для бенчмарков клиентов.
+
+Сервер - минимальный HTTP/1.1 на asyncio с keep-alive, без сторонних зависимостей.
+Задержка ответа и доля ошибок настраиваются; клиенты направляются на заглушку
+переопределением URL атрибутов (SmshubClient.BASE_API_URL, GoogleAPIsClient.SIGN_IN_WITH_IDP_URL, ...).
+"""
+import asyncio
+import json
+import random
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+from dataclasses import dataclass
+from itertools import count
+from urllib.parse import parse_qsl, urlsplit
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 429: "Too Many Requests", 503: "Service Unavailable"}
+
+Response = tuple[int, dict[str, str], bytes]
+
+
+class MockHTTPServer(ABC):
+    def __init__(
+            self,
+            *,
+            latency: float = 0.0,
+            jitter: float = 0.5,
+            error_rate: float = 0.0,
+            host: str = "127.0.0.1",
+            port: int = 0,
+            seed: int = 0,
+    ):
+        """
+        :param latency: Задержка перед каждым ответом в секундах.
+        :param jitter: Задержка умножается на случайное число из [1 - jitter, 1 + jitter].
+        :param error_rate: Доля запросов, на которые отвечает ошибкой сервиса.
+        :param port: 0 - любой свободный порт.
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.host = host
+        self.port = port
+        self.requests = Counter()  # Путь или действие -> количество запросов
+        self.responses = Counter()  # Тип ответа -> количество
+        self._random = random.Random(seed)
+        self._server: asyncio.Server | None = None
+        self._connections: dict[asyncio.Task, asyncio.StreamWriter] = {}
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._serve_connection, self.host, self.port, backlog=4096)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        self._server.close()
+        # Клиенты держат keep-alive соединения: закрываем их сами и ждем, пока обработчики получат EOF
+        connections = dict(self._connections)
+        for writer in connections.values():
+            writer.close()
+        await asyncio.gather(*connections, return_exceptions=True)
+        await self._server.wait_closed()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def _fail(self) -> bool:
+        return self._random.random() < self.error_rate
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self._connections[task] = writer
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                url = urlsplit(target)
+                if self.latency:
+                    await asyncio.sleep(self.latency * self._random.uniform(1 - self.jitter, 1 + self.jitter))
+                status, response_headers, response_body = await self.handle(
+                    method, url.path, dict(parse_qsl(url.query)), headers, body)
+
+                keep_alive = headers.get("connection", "").lower() != "close"
+                head = [f"HTTP/1.1 {status} {_REASONS.get(status, 'Unknown')}",
+                        f"Content-Length: {len(response_body)}",
+                        f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+                head.extend(f"{name}: {value}" for name, value in response_headers.items())
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + response_body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self._connections.pop(task, None)
+            writer.close()
+
+    @abstractmethod
+    async def handle(self, method: str, path: str, query: dict, headers: dict, body: bytes) -> Response:
+        """Ответ заглушки на один запрос."""
+
+
+@dataclass
+class _Activation:
+    number: str
+    created_at: float
+    status: str = "STATUS_WAIT_CODE"
+    code: str | None = None
+
+
+class MockSmshubServer(MockHTTPServer):
+    """
+    Текстовый протокол handler_api.php: getBalance, getNumber, setStatus, getStatus, getCurrentActivations.
+    Код приходит через code_delay секунд после покупки номера.
+    """
+    API_PATH = "/stubs/handler_api.php"
+
+    def __init__(
+            self,
+            *,
+            code_delay: float = 1.0,
+            no_numbers_rate: float = 0.0,
+            api_key: str = None,
+            **kwargs,
+    ):
+        """
+        :param code_delay: Через сколько секунд после покупки номера приходит код.
+        :param no_numbers_rate: Доля запросов getNumber, на которые отвечает NO_NUMBERS.
+        :param api_key: Если задан, на другие ключи отвечает BAD_KEY.
+        :param kwargs: Параметры MockHTTPServer. Ошибка сервиса - ERROR_SQL.
+        """
+        super().__init__(**kwargs)
+        self.code_delay = code_delay
+        self.no_numbers_rate = no_numbers_rate
+        self.api_key = api_key
+        self._activations: dict[int, _Activation] = {}
+        self._ids = count(100_000)
+
+    @property
+    def api_url(self) -> str:
+        return self.url + self.API_PATH
+
+    def _text(self, text: str) -> Response:
+        self.responses[text.split(":", 1)[0]] += 1
+        return 200, {"Content-Type": "text/plain"}, text.encode()
+
+    def _json(self, data) -> Response:
+        self.responses["JSON"] += 1
+        return 200, {"Content-Type": "application/json"}, json.dumps(data).encode()
+
+    def _update(self, activation: _Activation):
+        if activation.status == "STATUS_WAIT_CODE" and time.monotonic() - activation.created_at >= self.code_delay:
+            activation.code = f"{self._random.randrange(1_000_000):06}"
+            activation.status = f"STATUS_OK:{activation.code}"
+
+    async def handle(self, method: str, path: str, query: dict, headers: dict, body: bytes) -> Response:
+        if path != self.API_PATH:
+            return 404, {}, b""
+        if method == "POST" and headers.get("content-type", "").startswith("application/x-www-form-urlencoded"):
+            query = {**query, **dict(parse_qsl(body.decode()))}
+
+        action = query.get("action", "")
+        self.requests[action] += 1
+        if self.api_key is not None and query.get("api_key") != self.api_key:
+            return self._text("BAD_KEY")
+        if self._fail():
+            return self._text("ERROR_SQL")
+
+        if action == "getBalance":
+            return self._text("ACCESS_BALANCE:100.00")
+
+        if action == "getNumber":
+            if self._random.random() < self.no_numbers_rate:
+                return self._text("NO_NUMBERS")
+            id = next(self._ids)
+            number = f"628{self._random.randrange(10 ** 9):09}"
+            self._activations[id] = _Activation(number=number, created_at=time.monotonic())
+            return self._text(f"ACCESS_NUMBER:{id}:{number}")
+
+        activation = self._activations.get(int(query["id"])) if query.get("id", "").isdigit() else None
+
+        if action == "getStatus":
+            if activation is None:
+                return self._text("NO_ACTIVATION")
+            self._update(activation)
+            return self._text(activation.status)
+
+        if action == "setStatus":
+            if activation is None:
+                return self._text("NO_ACTIVATION")
+            status = query.get("status")
+            if status == "1":
+                return self._text("ACCESS_READY")
+            if status == "3":
+                activation.status, activation.created_at = "STATUS_WAIT_CODE", time.monotonic()
+                return self._text("ACCESS_RETRY_GET")
+            if status == "6":
+                activation.status = "STATUS_OK_FINISHED"
+                self._activations.pop(int(query["id"]))
+                return self._text("ACCESS_ACTIVATION")
+            if status == "8":
+                self._activations.pop(int(query["id"]))
+                return self._text("ACCESS_CANCEL")
+            return self._text("BAD_STATUS")
+
+        if action == "getCurrentActivations":
+            activations = []
+            for id, activation in self._activations.items():
+                self._update(activation)
+                activations.append({"activationId": id, "phoneNumber": activation.number, "smsCode": activation.code})
+            return self._json({"status": "success", "array": activations})
+
+        return self._text("BAD_ACTION")
+
+
+class MockGoogleAPIsServer(MockHTTPServer):
+    """
+    JSON endpoints identitytoolkit и securetoken, которые использует GoogleAPIsClient.
+    Ошибка сервиса - 503, троттлинг - 429.
+    """
+    CREATE_AUTH_URI_PATH = "/identitytoolkit/v3/relyingparty/createAuthUri"
+    SIGN_IN_WITH_IDP_PATH = "/v1/accounts:signInWithIdp"
+    ACCOUNTS_LOOKUP_PATH = "/v1/accounts:lookup"
+    SECURE_TOKEN_PATH = "/v1/token"
+
+    def __init__(self, *, throttle_rate: float = 0.0, retry_after: int = None, **kwargs):
+        """
+        :param throttle_rate: Доля запросов, на которые отвечает 429.
+        :param retry_after: Значение заголовка Retry-After в ответах 429.
+        :param kwargs: Параметры MockHTTPServer.
+        """
+        super().__init__(**kwargs)
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self._tokens = count(1)
+
+    def client_urls(self) -> dict[str, str]:
+        """
+        URL атрибуты GoogleAPIsClient, указывающие на заглушку.
+        """
+        return {
+            "CREATE_AUTH_URI_URL": self.url + self.CREATE_AUTH_URI_PATH,
+            "SIGN_IN_WITH_IDP_URL": self.url + self.SIGN_IN_WITH_IDP_PATH,
+            "ACCOUNTS_LOOKUP_URL": self.url + self.ACCOUNTS_LOOKUP_PATH,
+            "SECURE_TOKEN_URL": self.url + self.SECURE_TOKEN_PATH,
+        }
+
+    def _json(self, status: int, data: dict, headers: dict = None) -> Response:
+        self.responses[status] += 1
+        return status, {"Content-Type": "application/json", **(headers or {})}, json.dumps(data).encode()
+
+    def _error(self, status: int, message: str, reason: str, headers: dict = None) -> Response:
+        error = {"code": status, "message": message, "errors": [{"message": message, "reason": reason}]}
+        return self._json(status, {"error": error}, headers)
+
+    def _token(self) -> dict:
+        number = next(self._tokens)
+        return {"idToken": f"fake-id-token-{number}", "refreshToken": f"fake-refresh-token-{number}", "expiresIn": "3600"}
+
+    async def handle(self, method: str, path: str, query: dict, headers: dict, body: bytes) -> Response:
+        self.requests[path] += 1
+        if method != "POST":
+            return self._error(404, "Not Found", "notFound")
+        if not query.get("key"):
+            return self._error(400, "API key not valid. Please pass a valid API key.", "badRequest")
+        if self._random.random() < self.throttle_rate:
+            headers = {"Retry-After": str(self.retry_after)} if self.retry_after is not None else None
+            return self._error(429, "Quota exceeded", "rateLimitExceeded", headers)
+        if self._fail():
+            return self._error(503, "The service is currently unavailable.", "backendError")
+
+        if path == self.CREATE_AUTH_URI_PATH:
+            session_id = f"fake-session-{next(self._tokens)}"
+            return self._json(200, {
+                "kind": "identitytoolkit#CreateAuthUriResponse",
+                "authUri": f"https://accounts.google.com/o/oauth2/auth?state={session_id}",
+                "providerId": "google.com",
+                "sessionId": session_id,
+            })
+
+        if path == self.SIGN_IN_WITH_IDP_PATH:
+            token = self._token()
+            return self._json(200, {
+                "kind": "identitytoolkit#VerifyAssertionResponse",
+                "providerId": "google.com",
+                "email": f"user{token['idToken'].rsplit('-', 1)[1]}@gmail.com",
+                "localId": token["idToken"].rsplit("-", 1)[1],
+                **token,
+            })
+
+        if path == self.ACCOUNTS_LOOKUP_PATH:
+            return self._json(200, {
+                "kind": "identitytoolkit#GetAccountInfoResponse",
+                "users": [{"localId": "1", "email": "user1@gmail.com", "emailVerified": True}],
+            })
+
+        if path == self.SECURE_TOKEN_PATH:
+            token = self._token()
+            return self._json(200, {
+                "access_token": token["idToken"],
+                "id_token": token["idToken"],
+                "refresh_token": token["refreshToken"],
+                "expires_in": token["expiresIn"],
+                "token_type": "Bearer",
+            })
+
+        return self._error(404, "Not Found", "notFound")
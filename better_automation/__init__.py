@@ -1,8 +1,18 @@
-from . import googleapis, google, smshub
+from typing import TYPE_CHECKING
+
+from ._lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from . import googleapis, google, smshub, captcha
 
 
 __all__ = [
     "googleapis",
     "google",
     "smshub",
+    "captcha",
 ]
+
+# Подпакеты импортируются при первом обращении, чтобы воркеры, которым нужен только smshub или googleapis,
+# не загружали Playwright
+__getattr__, __dir__ = lazy_exports(__name__, {name: name for name in __all__})
@@ -0,0 +1,29 @@
+import importlib
+import sys
+from typing import Any, Callable
+
+
+def lazy_exports(package: str, exports: dict[str, str]) -> tuple[Callable[[str], Any], Callable[[], list[str]]]:
+    """
+    Модульные __getattr__ и __dir__ (PEP 562), импортирующие подмодули пакета при первом обращении к имени.
+    Тяжелые зависимости (Playwright, tweepy-self, curl_cffi) загружаются, только когда они действительно нужны.
+
+    :param package: __name__ пакета.
+    :param exports: {имя: подмодуль}. Если имя совпадает с подмодулем, возвращается сам подмодуль.
+    :return: __getattr__, __dir__
+    """
+    namespace = sys.modules[package].__dict__
+
+    def __getattr__(name: str) -> Any:
+        submodule = exports.get(name)
+        if submodule is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        module = importlib.import_module(f".{submodule}", package)
+        value = module if name == submodule else getattr(module, name)
+        namespace[name] = value  # Следующие обращения не доходят до __getattr__
+        return value
+
+    def __dir__() -> list[str]:
+        return sorted({*namespace, *exports})
+
+    return __getattr__, __dir__
@@ -0,0 +1,28 @@
+from typing import TYPE_CHECKING
+
+from .._lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .base import CaptchaSolver, CaptchaTask
+    from .queue import CaptchaQueue
+    from .fake import FakeCaptchaSolver
+    from .capsolver import CapsolverSolver
+    from . import errors
+
+__all__ = [
+    "CaptchaSolver",
+    "CaptchaTask",
+    "CaptchaQueue",
+    "FakeCaptchaSolver",
+    "CapsolverSolver",
+    "errors",
+]
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    "CaptchaSolver": "base",
+    "CaptchaTask": "base",
+    "CaptchaQueue": "queue",
+    "FakeCaptchaSolver": "fake",
+    "CapsolverSolver": "capsolver",
+    "errors": "errors",
+})
@@ -0,0 +1,27 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class CaptchaTask:
+    """
+    Задача на решение reCAPTCHA v2.
+    """
+    sitekey: str
+    page_url: str
+    enterprise: bool = False
+    invisible: bool = False
+
+
+class CaptchaSolver(ABC):
+    """
+    Бэкенд решения капчи: получает задачу и возвращает токен (g-recaptcha-response).
+    При неудаче вызывает CaptchaSolvingError.
+    """
+
+    @abstractmethod
+    async def solve(self, task: CaptchaTask) -> str:
+        ...
+
+    async def close(self):
+        pass
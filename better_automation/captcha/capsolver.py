@@ -0,0 +1,42 @@
+try:
+    from python3_capsolver.recaptcha import ReCaptcha
+except ImportError as exc:
+    raise ImportError(
+        "CapsolverSolver requires python3-capsolver: pip install better-automation[capsolver]"
+    ) from exc
+
+from .base import CaptchaSolver, CaptchaTask
+from .errors import CaptchaSolvingError
+
+
+class CapsolverSolver(CaptchaSolver):
+    """
+    Решение через capsolver.com (python3-capsolver 0.9, extra capsolver).
+    """
+
+    def __init__(self, api_key: str, *, sleep_time: int = 5):
+        """
+        :param sleep_time: Пауза между запросами статуса задачи в секундах, python3-capsolver требует не меньше 5.
+        """
+        self.api_key = api_key
+        self.sleep_time = sleep_time
+
+    async def solve(self, task: CaptchaTask) -> str:
+        captcha_type = "ReCaptchaV2EnterpriseTaskProxyLess" if task.enterprise else "ReCaptchaV2TaskProxyLess"
+        extra = {"isInvisible": True} if task.invisible else {}
+        try:
+            response = await ReCaptcha(
+                api_key=self.api_key,
+                captcha_type=captcha_type,
+                websiteURL=task.page_url,
+                websiteKey=task.sitekey,
+                sleep_time=self.sleep_time,
+                **extra,
+            ).aio_captcha_handler()
+        except Exception as exc:
+            # Сетевые ошибки и ошибки валидации python3-capsolver - тоже неудача решения
+            raise CaptchaSolvingError(f"{type(exc).__name__}: {exc}") from exc
+
+        if response.errorId or not response.solution or "gRecaptchaResponse" not in response.solution:
+            raise CaptchaSolvingError(response.errorDescription or response.errorCode or "No solution")
+        return response.solution["gRecaptchaResponse"]
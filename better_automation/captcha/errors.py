@@ -0,0 +1,3 @@
+class CaptchaSolvingError(Exception):
+    """Исключение, вызываемое если бэкенд не смог решить капчу."""
+    pass
@@ -0,0 +1,39 @@
+import asyncio
+import random
+from itertools import count
+
+from .base import CaptchaSolver, CaptchaTask
+from .errors import CaptchaSolvingError
+
+
+class FakeCaptchaSolver(CaptchaSolver):
+    """
+    Локальный решатель для тестов и бенчмарков: через delay секунд возвращает фиктивный токен.
+    """
+
+    def __init__(
+            self,
+            *,
+            delay: float = 1.0,
+            jitter: float = 0.5,
+            error_rate: float = 0.0,
+            seed: int = None,
+    ):
+        """
+        :param delay: Время решения в секундах.
+        :param jitter: Время решения умножается на случайное число из [1 - jitter, 1 + jitter].
+        :param error_rate: Доля задач, которые завершаются CaptchaSolvingError.
+        """
+        self.delay = delay
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.tasks: list[CaptchaTask] = []
+        self._random = random.Random(seed)
+        self._numbers = count(1)
+
+    async def solve(self, task: CaptchaTask) -> str:
+        self.tasks.append(task)
+        await asyncio.sleep(self.delay * self._random.uniform(1 - self.jitter, 1 + self.jitter))
+        if self._random.random() < self.error_rate:
+            raise CaptchaSolvingError("ERROR_CAPTCHA_UNSOLVABLE")
+        return f"fake-token-{next(self._numbers)}-{task.sitekey}"
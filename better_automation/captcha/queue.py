@@ -0,0 +1,98 @@
+import asyncio
+from collections import Counter
+
+from .base import CaptchaSolver, CaptchaTask
+from .errors import CaptchaSolvingError
+
+
+class CaptchaQueue:
+    """
+    Очередь задач на решение капчи, общая для многих контекстов:
+        - Задача отправляется бэкенду сразу при вызове submit, страница в это время может продолжать работу.
+        - Одновременно решается не более concurrency задач, остальные ждут в очереди.
+        - Одинаковые задачи, ожидающие в очереди, не объединяются: токен reCAPTCHA одноразовый.
+        - Любая ошибка бэкенда доходит до ожидающего как CaptchaSolvingError.
+    """
+
+    def __init__(self, solver: CaptchaSolver, *, concurrency: int = 20):
+        """
+        :param solver: Бэкенд решения.
+        :param concurrency: Максимальное количество одновременно решаемых задач.
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+
+        self.solver = solver
+        self.concurrency = concurrency
+        self.stats = Counter()  # submitted, solved, failed, cancelled
+        self._queue: asyncio.Queue[tuple[CaptchaTask, asyncio.Future]] = asyncio.Queue()
+        self._workers: list[asyncio.Task] = []
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    async def _work(self):
+        while True:
+            task, future = await self._queue.get()
+            try:
+                if future.done():
+                    # Ожидающий уже ушел (таймаут или отмена), не тратим на задачу деньги
+                    self.stats["cancelled"] += 1
+                    continue
+                try:
+                    token = await self.solver.solve(task)
+                except Exception as exc:
+                    self.stats["failed"] += 1
+                    if not isinstance(exc, CaptchaSolvingError):
+                        # Бэкенд обязан вызывать CaptchaSolvingError, остальное оборачиваем
+                        error = CaptchaSolvingError(f"{type(exc).__name__}: {exc}")
+                        error.__cause__ = exc
+                        exc = error
+                    if not future.done():
+                        future.set_exception(exc)
+                else:
+                    self.stats["solved"] += 1
+                    if not future.done():
+                        future.set_result(token)
+            finally:
+                self._queue.task_done()
+
+    def _ensure_workers(self):
+        self._workers = [worker for worker in self._workers if not worker.done()]
+        while len(self._workers) < self.concurrency:
+            self._workers.append(asyncio.create_task(self._work()))
+
+    def submit(self, task: CaptchaTask) -> asyncio.Future[str]:
+        """
+        Ставит задачу в очередь.
+        :return: Future с токеном. Отмена future снимает задачу, если она еще не начала решаться.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((task, future))
+        self.stats["submitted"] += 1
+        self._ensure_workers()
+        return future
+
+    async def solve(self, task: CaptchaTask, timeout: float = None) -> str:
+        future = self.submit(task)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            future.cancel()
+
+    async def close(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            future.cancel()
+        await self.solver.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
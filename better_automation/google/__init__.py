@@ -1,7 +1,31 @@
-from .browser import GooglePlaywrightBrowserContext
-from .account import GoogleAccount
+from typing import TYPE_CHECKING
+
+from .._lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .browser import GooglePlaywrightBrowserContext
+    from .account import GoogleAccount
+    from .sessions import GoogleSessionStore
+    from .journal import GoogleAccountsJournal
+    from .cookies_checker import GoogleCookiesChecker
+    from .runner import GoogleAccountsRunner, AccountResult
 
 __all__ = [
     "GooglePlaywrightBrowserContext",
     "GoogleAccount",
+    "GoogleAccountsRunner",
+    "AccountResult",
+    "GoogleSessionStore",
+    "GoogleAccountsJournal",
+    "GoogleCookiesChecker",
 ]
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    "GooglePlaywrightBrowserContext": "browser",
+    "GoogleAccount": "account",
+    "GoogleAccountsRunner": "runner",
+    "AccountResult": "runner",
+    "GoogleSessionStore": "sessions",
+    "GoogleAccountsJournal": "journal",
+    "GoogleCookiesChecker": "cookies_checker",
+})
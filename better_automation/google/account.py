@@ -1,6 +1,11 @@
+import json
+import mmap
+import os
+import zlib
 from enum import StrEnum
+from itertools import islice
 from pathlib import Path
-from typing import Sequence, Iterable
+from typing import Iterator, Sequence, Iterable
 
 from pydantic import BaseModel
 
@@ -36,6 +41,8 @@ class GoogleAccount(BaseModel):
     recovery_email: str | None = None
     # TODO Валидировать cookies
     cookies:        list | None = None
+    # Playwright storage state: cookies и localStorage
+    storage_state:  dict | None = None
     status: GoogleAccountStatus = GoogleAccountStatus.UNKNOWN
 
     @property
@@ -49,6 +56,160 @@ class GoogleAccount(BaseModel):
         return self.email
 
 
+def _pack(value: list | dict | None) -> bytes | None:
+    if value is None:
+        return None
+    # Уровень 1: размер почти как у уровня по умолчанию, но сжатие быстрее
+    return zlib.compress(json.dumps(value, separators=(",", ":")).encode(), 1)
+
+
+def _unpack(value: bytes | None) -> list | dict | None:
+    if value is None:
+        return None
+    return json.loads(zlib.decompress(value))
+
+
+class CompactGoogleAccount:
+    """
+    Легковесная замена GoogleAccount для очень больших пачек аккаунтов:
+        - Без pydantic и без __dict__ (__slots__).
+        - cookies и storage_state хранятся сжатым JSON и распаковываются только при обращении.
+    Имеет те же атрибуты, что и GoogleAccount, поэтому подходит для GooglePlaywrightBrowserContext и to_file.
+    Так как cookies распаковываются при каждом обращении, изменения в полученном списке не сохраняются:
+    чтобы изменить cookies, присвойте новый список.
+
+    Это обмен скорости на память: аккаунт с cookies занимает примерно в 10 раз меньше, чем GoogleAccount,
+    но создается примерно в 3 раза медленнее (сериализация и сжатие), а каждое чтение cookies
+    или storage_state стоит распаковки и разбора JSON. Читайте их один раз в локальную переменную
+    (см. benchmarks/account_memory.py).
+    """
+    __slots__ = ("email", "password", "recovery_email", "status", "_cookies", "_storage_state")
+
+    def __init__(
+            self,
+            email: str,
+            password: str,
+            recovery_email: str | None = None,
+            cookies: list | None = None,
+            storage_state: dict | None = None,
+            status: GoogleAccountStatus = GoogleAccountStatus.UNKNOWN,
+    ):
+        self.email = email
+        self.password = password
+        self.recovery_email = recovery_email
+        self.status = GoogleAccountStatus(status)
+        self.cookies = cookies
+        self.storage_state = storage_state
+
+    @property
+    def cookies(self) -> list | None:
+        return _unpack(self._cookies)
+
+    @cookies.setter
+    def cookies(self, cookies: list | None):
+        self._cookies = _pack(cookies)
+
+    @property
+    def storage_state(self) -> dict | None:
+        return _unpack(self._storage_state)
+
+    @storage_state.setter
+    def storage_state(self, storage_state: dict | None):
+        self._storage_state = _pack(storage_state)
+
+    @classmethod
+    def from_account(cls, account: GoogleAccount) -> "CompactGoogleAccount":
+        return cls(
+            account.email,
+            account.password,
+            account.recovery_email,
+            account.cookies,
+            account.storage_state,
+            account.status,
+        )
+
+    def to_account(self) -> GoogleAccount:
+        return GoogleAccount(
+            email=self.email,
+            password=self.password,
+            recovery_email=self.recovery_email,
+            cookies=self.cookies,
+            storage_state=self.storage_state,
+            status=self.status,
+        )
+
+    @property
+    def hidden_password(self) -> str | None:
+        return hidden_value(self.password) if self.password else None
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(email={self.email})"
+
+    def __str__(self):
+        return self.email
+
+
+AnyGoogleAccount = GoogleAccount | CompactGoogleAccount
+
+
+def _parse_account(
+        line: str,
+        separator: str,
+        fields: Sequence[str],
+        account_class: type[AnyGoogleAccount] = GoogleAccount,
+) -> AnyGoogleAccount:
+    data = dict(zip(fields, line.split(separator)))
+    data.update({key: None for key in data if not data[key]})
+    return account_class(**data)
+
+
+def _format_account(account: AnyGoogleAccount, separator: str, fields: Sequence[str]) -> str:
+    account_data = []
+    for field_name in fields:
+        field = getattr(account, field_name)
+        field = field if field is not None else ""
+        account_data.append(field)
+    return separator.join(account_data)
+
+
+def _iter_lines(filepath: Path | str, use_mmap: bool = False) -> Iterator[str]:
+    with open(filepath, "rb") as file:
+        if use_mmap and os.fstat(file.fileno()).st_size:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+                raw_lines = iter(mapped_file.readline, b"")
+                for raw_line in raw_lines:
+                    yield raw_line.decode()
+        else:
+            for raw_line in file:
+                yield raw_line.decode()
+
+
+def iter_file(
+        filepath: Path | str,
+        *,
+        separator: str = ":",
+        fields: Sequence[str] = ("email", "password", "recovery_email"),
+        offset: int = 0,
+        limit: int = None,
+        use_mmap: bool = False,
+        account_class: type[AnyGoogleAccount] = GoogleAccount,
+) -> Iterator[AnyGoogleAccount]:
+    """
+    Ленивый вариант from_file: аккаунты создаются по одному во время итерации.
+    Пустые строки пропускаются и не учитываются в offset и limit.
+
+    :param offset: Сколько аккаунтов пропустить с начала файла (для шардирования).
+    :param limit: Максимальное количество аккаунтов. None - до конца файла.
+    :param use_mmap: Читать файл через mmap.
+    :param account_class: GoogleAccount или CompactGoogleAccount.
+    """
+    lines = (line.strip() for line in _iter_lines(filepath, use_mmap))
+    lines = (line for line in lines if line)
+    stop = offset + limit if limit is not None else None
+    for line in islice(lines, offset, stop):
+        yield _parse_account(line, separator, fields, account_class)
+
+
 def from_file(
         filepath: Path | str,
         *,
@@ -64,25 +225,102 @@ def from_file(
     """
     accounts = []
     for line in load_lines(filepath):
-        data = dict(zip(fields, line.split(separator)))
-        data.update({key: None for key in data if not data[key]})
-        accounts.append(GoogleAccount(**data))
+        accounts.append(_parse_account(line, separator, fields))
     return accounts
 
 
 def to_file(
         filepath: Path | str,
-        accounts: Iterable[GoogleAccount],
+        accounts: Iterable[AnyGoogleAccount],
         *,
         separator: str = ";",
         fields: Sequence[str] = ("email", "password", "recovery_email"),
 ):
     lines = []
     for account in accounts:
-        account_data = []
-        for field_name in fields:
-            field = getattr(account, field_name)
-            field = field if field is not None else ""
-            account_data.append(field)
-        lines.append(separator.join(account_data))
+        lines.append(_format_account(account, separator, fields))
     write_lines(filepath, lines)
+
+
+class GoogleAccountsWriter:
+    """
+    Дописывает аккаунты в конец файла по одному, не переписывая файл целиком.
+    Обновление аккаунта - это новая строка с тем же email, после compact() остается только последняя запись.
+    """
+
+    def __init__(
+            self,
+            filepath: Path | str,
+            *,
+            separator: str = ";",
+            fields: Sequence[str] = ("email", "password", "recovery_email"),
+            flush: bool = True,
+    ):
+        """
+        :param flush: Сбрасывать буфер после каждой записи, чтобы прогресс не терялся при падении.
+        """
+        self.filepath = filepath
+        self.separator = separator
+        self.fields = fields
+        self.flush = flush
+        self._open()
+
+    def _open(self):
+        self._file = open(self.filepath, "a")
+        # Если файл не заканчивается переводом строки, первая запись склеилась бы с последней строкой
+        self._needs_newline = self._file.tell() > 0 and not self._ends_with_newline()
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.filepath, "rb") as file:
+            file.seek(-1, os.SEEK_END)
+            return file.read(1) == b"\n"
+
+    def write(self, account: AnyGoogleAccount):
+        if self._needs_newline:
+            self._file.write("\n")
+            self._needs_newline = False
+        self._file.write(_format_account(account, self.separator, self.fields) + "\n")
+        if self.flush:
+            self._file.flush()
+
+    def write_many(self, accounts: Iterable[AnyGoogleAccount]):
+        for account in accounts:
+            self.write(account)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def compact(self):
+        """
+        Переписывает файл один раз, оставляя только последнюю запись для каждого email.
+        """
+        # Файл заменяется новым, поэтому старый дескриптор нужно переоткрыть
+        self._file.close()
+        compact_file(self.filepath, separator=self.separator)
+        self._open()
+
+
+def compact_file(filepath: Path | str, *, separator: str = ";"):
+    """
+    Оставляет в файле только последнюю запись для каждого email. Email должен быть первым полем.
+    Файл заменяется атомарно.
+    """
+    lines = {}
+    for line in _iter_lines(filepath):
+        line = line.strip()
+        if not line:
+            continue
+        email = line.split(separator, 1)[0].lower()
+        # Перемещаем в конец, чтобы порядок соответствовал последней записи
+        lines.pop(email, None)
+        lines[email] = line
+
+    tmp_filepath = f"{filepath}.tmp"
+    write_lines(tmp_filepath, lines.values())
+    os.replace(tmp_filepath, filepath)
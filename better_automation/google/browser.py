@@ -1,5 +1,9 @@
+import asyncio
+import json
 import re
-from typing import Literal
+from contextlib import asynccontextmanager
+from enum import StrEnum
+from typing import Awaitable, Iterable, Literal, Sequence
 
 from yarl import URL
 from playwright.async_api import BrowserContext, Request, TimeoutError as PlaywrightTimeoutError, Page
@@ -13,14 +17,44 @@ from .errors import (
     RecoveryEmailRequired,
     PhoneVerificationRequired,
 )
-from .account import GoogleAccount, GoogleAccountStatus
-from .utils import check_cookies
-from ..smshub import SmshubClient
+from .account import AnyGoogleAccount, GoogleAccountStatus
+from .journal import GoogleAccountsJournal
+from .sessions import GoogleSessionStore
+from .utils import GOOGLE_AUTH_COOKIES, check_cookies, race
+from ..captcha import CaptchaQueue, CaptchaTask
+from ..captcha.errors import CaptchaSolvingError
+from ..metrics import Metrics, span
+from ..playwright_ import ResourceBlocker, TrafficCounter
+from ..smshub import SmshubClient, SmshubCodePoller, SmshubNumberPool
 from ..smshub.errors import SmsServiceError
 
 
 PromptType = Literal["consent", "select_account"] | None
 
+# Не грузит картинки, шрифты, медиа, аналитику и телеметрию.
+# Все, что относится к reCAPTCHA (включая картинки заданий), пропускается.
+GOOGLE_RESOURCE_BLOCKER = ResourceBlocker(
+    resource_types=("image", "media", "font"),
+    hosts=(
+        "www.google-analytics.com",
+        "ssl.google-analytics.com",
+        "analytics.google.com",
+        "www.googletagmanager.com",
+        "googleads.g.doubleclick.net",
+        "stats.g.doubleclick.net",
+        "adservice.google.com",
+        "csp.withgoogle.com",
+    ),
+    url_patterns=(
+        r"^https://play\.google\.com/log",
+        r"^https://[^/]+\.google\.com/(gen_204|jserror|cspreport)",
+        r"^https://accounts\.google\.com/_/.+/(jserror|cspreport)",
+    ),
+    allow_url_patterns=(
+        r"/recaptcha/",
+    ),
+)
+
 
 def are_valid_google_cookies(cookies: list[dict]) -> bool:
     """
@@ -55,7 +89,24 @@ def are_valid_google_cookies(cookies: list[dict]) -> bool:
         __Host-3PLSID
         __Host-GAPS
     """
-    return check_cookies(cookies, {"SID", "HSID"})
+    return check_cookies(cookies, GOOGLE_AUTH_COOKIES)
+
+
+class PageState(StrEnum):
+    UNKNOWN = "UNKNOWN"
+    LOGGED_IN = "LOGGED_IN"
+    REDIRECTED = "REDIRECTED"
+    CONSENT = "CONSENT"
+    PASSWORD = "PASSWORD"
+    CAPTCHA = "CAPTCHA"
+    RECOVERY_EMAIL = "RECOVERY_EMAIL"
+    RECOVERY_REQUIRED = "RECOVERY_REQUIRED"
+    VERIFY_ON_DEVICE = "VERIFY_ON_DEVICE"
+    PASSKEY = "PASSKEY"
+    PHONE_VERIFICATION = "PHONE_VERIFICATION"
+
+    def __str__(self):
+        return self.value
 
 
 class GooglePlaywrightBrowserContext:
@@ -70,6 +121,26 @@ class GooglePlaywrightBrowserContext:
     _LEFT_BUTTON_XPATH = '//div[@jsname="QkNstf"]/div/div/button'  # Not now, Try another way
     _RIGHT_BUTTON_XPATH = '//div[@jsname="Njthtb"]/div/button'  # Continue, Send, Next
     # _ERRORS_COUNT_XPATH = '//div[@jsname="B34EJ"]'
+    # Записывает токен в поля g-recaptcha-response и вызывает callback виджета, если страница его задала
+    _INJECT_RECAPTCHA_TOKEN_SCRIPT = """
+token => {
+    for (const textarea of document.querySelectorAll('textarea[name="g-recaptcha-response"]')) {
+        textarea.value = token;
+        textarea.innerHTML = token;
+    }
+    const seen = new Set();
+    const visit = (object, depth) => {
+        if (!object || typeof object !== "object" || depth > 4 || seen.has(object)) return;
+        seen.add(object);
+        for (const [key, value] of Object.entries(object)) {
+            if (key === "callback" && typeof value === "function") value(token);
+            else if (key === "callback" && typeof window[value] === "function") window[value](token);
+            else visit(value, depth + 1);
+        }
+    };
+    Object.values((window.___grecaptcha_cfg || {}).clients || {}).forEach(client => visit(client, 0));
+}
+"""
 
     # Logining
     _EMAIL_FIELD_XPATH = '//*[@id="identifierId"]'
@@ -83,6 +154,7 @@ class GooglePlaywrightBrowserContext:
     # Logining: patterns
     _RECOVERY_REQUIRED_URL_PATTERN = re.compile(r"https://accounts\.google\.com/v3/signin/rejected.*")
     _PASSKEY_URL_PATTERN = re.compile(r"https://accounts\.google\.com/signin/v2/passkeyenrollment.*")
+    _PHONE_VERIFICATION_URL_PATTERN = re.compile(r"https://accounts\.google\.com/speedbump/idvreenable.*")
     _MY_ACCOUNT_URL_PATTERN = re.compile(r"https://myaccount\.google\.com.*")
     _GDS_URL_PATTERN = re.compile(r"https://gds\.google\.com.*")
     _LOGGED_IN_URL_PATTERNS = (_MY_ACCOUNT_URL_PATTERN, _GDS_URL_PATTERN)
@@ -98,10 +170,66 @@ class GooglePlaywrightBrowserContext:
     _NEXT_BUTTON_XPATH = '//*[@id="next-button"]'
     _ERROR_SPAN_XPATH = '//span[@id="error"]'
 
+    # Storage state
+    # Не перезаписывает ключи, которые страница уже успела изменить
+    _RESTORE_LOCAL_STORAGE_SCRIPT = """
+(origins => {
+    const origin = origins.find(origin => origin.origin === location.origin);
+    if (!origin) return;
+    for (const {name, value} of origin.localStorage) {
+        if (localStorage.getItem(name) === null) localStorage.setItem(name, value);
+    }
+})(ORIGINS);
+"""
+
+    # Page states
+    # Признаки состояний страницы: элемент на странице и/или паттерн URL
+    _PAGE_STATE_XPATHS = {
+        PageState.CAPTCHA: _RECAPTCHA_IFRAME_XPATH,
+        PageState.PASSWORD: _PASSWORD_FIELD_XPATH,
+        PageState.RECOVERY_EMAIL: _RECOVERY_EMAIL_BUTTON_XPATH,
+        PageState.RECOVERY_REQUIRED: _RECOVERY_BUTTON_XPATH,
+        PageState.CONSENT: _CONTINUE_BUTTON_XPATH,
+    }
+    _PAGE_STATE_URL_PATTERNS = {
+        PageState.LOGGED_IN: _LOGGED_IN_URL_PATTERNS,
+        PageState.RECOVERY_REQUIRED: (_RECOVERY_REQUIRED_URL_PATTERN, ),
+        PageState.PASSKEY: (_PASSKEY_URL_PATTERN, ),
+        PageState.PHONE_VERIFICATION: (_PHONE_VERIFICATION_URL_PATTERN, ),
+    }
+    # Порядок важен: при одновременном появлении признаков побеждает состояние, стоящее раньше
+    _LOGIN_PAGE_STATES = (
+        PageState.LOGGED_IN,
+        PageState.CAPTCHA,
+        PageState.RECOVERY_REQUIRED,
+        PageState.RECOVERY_EMAIL,
+        PageState.PHONE_VERIFICATION,
+        PageState.PASSKEY,
+        PageState.PASSWORD,
+    )
+    _OAUTH2_PAGE_STATES = (
+        PageState.CAPTCHA,
+        PageState.RECOVERY_REQUIRED,
+        PageState.RECOVERY_EMAIL,
+        PageState.PASSWORD,
+        PageState.CONSENT,
+    )
+    # Промежуточные состояния, которые _pass_challenges проходит, а не возвращает
+    _PAGE_STATE_HANDLED = frozenset({
+        PageState.CAPTCHA,
+        PageState.PASSWORD,
+        PageState.RECOVERY_EMAIL,
+        PageState.RECOVERY_REQUIRED,
+        PageState.VERIFY_ON_DEVICE,
+        PageState.PASSKEY,
+        PageState.PHONE_VERIFICATION,
+    })
+    _MAX_PAGE_STATE_TRANSITIONS = 10
+
     def __init__(
             self,
             context: BrowserContext,
-            account: GoogleAccount,
+            account: AnyGoogleAccount,
             *,
             stealth: bool = False,
             time_to_wait: int = 10_000,
@@ -110,7 +238,33 @@ class GooglePlaywrightBrowserContext:
             # capsolver_api_key: str = None,
             smshub_api_key: str = None,
             max_attempts_to_verify_phone_number: int = 5,
+            block_resources: bool = False,
+            traffic_counter: TrafficCounter = None,
+            session_store: GoogleSessionStore = None,
+            storage_state_imported: bool = False,
+            journal: GoogleAccountsJournal = None,
+            sms_code_poller: SmshubCodePoller = None,
+            smshub_number_pool: SmshubNumberPool = None,
+            metrics: Metrics = None,
+            captcha_queue: CaptchaQueue = None,
     ):
+        """
+        :param block_resources: Не загружать необязательные ресурсы (GOOGLE_RESOURCE_BLOCKER) для экономии трафика.
+        :param traffic_counter: Счетчик трафика, в который также записываются заблокированные запросы.
+         Если передан, он уже должен быть подключен к контексту (как в new_context(traffic_counter=...)).
+         По умолчанию при block_resources создается свой и подключается к контексту.
+        :param session_store: Хранилище, из которого берутся и в которое сохраняются cookies после входа.
+        :param storage_state_imported: Контекст уже создан со снимком account.storage_state,
+         login() не загружает его повторно.
+        :param journal: Журнал, в который сразу записываются смена статуса аккаунта,
+         cookies после входа и каждый полученный OAuth2 код.
+        :param sms_code_poller: Общий опросчик кодов. Если передан, используется вместо smshub_api_key.
+        :param smshub_number_pool: Запас заранее купленных номеров для SMS верификации.
+        :param metrics: Метрики, в которые записывается длительность шагов login и oauth2.
+         Исход шага login - итоговый статус аккаунта, остальных шагов - "ok" или имя исключения.
+        :param captcha_queue: Очередь решения капчи. Если передана, reCAPTCHA решается бэкендом очереди
+         (не дольше time_to_solve_captcha, 0 или None - без ограничения), а wait_for_captcha_solving не используется.
+        """
         self._context = context
         self.account = account
         self.stealth = stealth
@@ -120,16 +274,33 @@ class GooglePlaywrightBrowserContext:
         # self.capsolver_api_key = capsolver_api_key
         self.smshub_api_key = smshub_api_key
         self.max_attempts_to_verify_phone_number = max_attempts_to_verify_phone_number
+        self.block_resources = block_resources
+        if block_resources and traffic_counter is None:
+            traffic_counter = TrafficCounter()
+            traffic_counter.attach(context)
+        self.traffic_counter = traffic_counter
+        self.session_store = session_store
+        self.storage_state_imported = storage_state_imported
+        self.journal = journal
+        self.sms_code_poller = sms_code_poller
+        self.smshub_number_pool = smshub_number_pool
+        self.metrics = metrics
+        self.captcha_queue = captcha_queue
 
         self._logged_in: bool = False
         self._needs_recovery_email: bool = False
 
+    def _journal(self, **artifacts):
+        if self.journal is not None:
+            self.journal.record(self.account, **artifacts)
+
     def _account_button_xpath(self) -> str:
         return self._ACCOUNT_BUTTON_XPATH.format(email=self.account.email.lower())
 
     async def _new_page(self):
         page = await self._context.new_page()
         if self.stealth: await stealth_async(page)
+        if self.block_resources: await GOOGLE_RESOURCE_BLOCKER.route(page, self.traffic_counter)
         return page
 
     async def _location_href(self, page) -> str:
@@ -138,6 +309,16 @@ class GooglePlaywrightBrowserContext:
     def logged_in(self) -> bool:
         return self._logged_in
 
+    @staticmethod
+    async def _wait_for_redirect(redirected: asyncio.Event, aw: Awaitable) -> bool:
+        """
+        :return: True, если редирект на redirect_uri произошел раньше, чем завершилась aw.
+        """
+        if redirected.is_set():
+            aw.close()
+            return True
+        return await race(redirected.wait(), aw) == 0
+
     async def _type_password_with_confirmation(self, page: Page):
         password_input_field = page.locator(self._PASSWORD_FIELD_XPATH)
         password_confirmation_button = page.locator(self._PASSWORD_CONFIRMATION_BUTTON_XPATH)
@@ -150,55 +331,47 @@ class GooglePlaywrightBrowserContext:
 
         await password_confirmation_button.click()
 
-    async def _check_recovery_email_verification(self, page: Page):
+    async def _pass_recovery_email_verification(self, page: Page):
         """
         Если в аккаунт с этого IP не входили ранее, то просит ввести recovery_email.
         Также может попросить recovery_email после прохождения капчи, что будет означать, что аккаунт мертв.
 
         https://accounts.google.com/v3/signin/challenge/selection
         """
-        recovery_email_button = page.locator(self._RECOVERY_EMAIL_BUTTON_XPATH)
-        try:
-            await recovery_email_button.wait_for(timeout=self.time_to_wait)
-            self._needs_recovery_email = True
-        except PlaywrightTimeoutError:
-            pass
-
-        if self._needs_recovery_email:
-            if not self.account.recovery_email:
-                self.account.status = GoogleAccountStatus.RECOVERY_EMAIL_REQUIRED
-                raise RecoveryEmailRequired(f"Failed to login Google account: recovery email required.")
-
-            await recovery_email_button.click()
-            await page.wait_for_load_state("load")
-            await page.locator(self._RECOVERY_EMAIL_FIELD_XPATH).type(self.account.recovery_email)
-            await page.locator(self._RIGHT_BUTTON_XPATH).click()
-            self._needs_recovery_email = False
+        self._needs_recovery_email = True
+        if not self.account.recovery_email:
+            self.account.status = GoogleAccountStatus.RECOVERY_EMAIL_REQUIRED
+            raise RecoveryEmailRequired(f"Failed to login Google account: recovery email required.")
 
+        await page.locator(self._RECOVERY_EMAIL_BUTTON_XPATH).click()
         await page.wait_for_load_state("load")
-
-        try:
-            await page.locator(self._RECOVERY_BUTTON_XPATH).wait_for(timeout=self.time_to_wait)
-            self.account.status = GoogleAccountStatus.RECOVERY_REQUIRED
-            raise RecoveryRequired("Failed to login Google account."
-                                   " Google: We noticed unusual activity in your Google Account."
-                                   " To keep your account safe, you were signed out."
-                                   " To continue, you’ll need to verify it’s you.")
-        except PlaywrightTimeoutError:
-            pass
-
-        await page.wait_for_load_state("load")
-
-        # https://accounts.google.com/v3/signin/challenge
-        # To help keep your account safe, Google wants to make sure it’s really you trying to sign in
-        # Open a browser on a phone or computer where you’re already signed in and go to:
-        # https://g.co/verifyaccount
-        if (await page.locator(self._LEFT_BUTTON_XPATH).count() > 0
-                and await page.locator(self._RIGHT_BUTTON_XPATH).count() == 0):
+        await page.locator(self._RECOVERY_EMAIL_FIELD_XPATH).type(self.account.recovery_email)
+        await page.locator(self._RIGHT_BUTTON_XPATH).click()
+        self._needs_recovery_email = False
+
+    def _raise_recovery_required(self, state: "PageState"):
+        self.account.status = GoogleAccountStatus.RECOVERY_REQUIRED
+        if state == PageState.VERIFY_ON_DEVICE:
+            # https://accounts.google.com/v3/signin/challenge
             raise RecoveryRequired("Failed to login Google account."
                                    " Google: To help keep your account safe, Google wants to make sure it’s really you trying to sign in"
                                    " Open a browser on a phone or computer where you’re already signed in and go to:"
                                    " https://g.co/verifyaccount")
+        raise RecoveryRequired("Failed to login Google account."
+                               " Google: We noticed unusual activity in your Google Account."
+                               " To keep your account safe, you were signed out."
+                               " To continue, you’ll need to verify it’s you.")
+
+    @asynccontextmanager
+    async def _smshub_client(self):
+        # Общие клиенты опросчика и пула номеров не закрываем
+        if self.sms_code_poller:
+            yield self.sms_code_poller.client
+        elif self.smshub_number_pool:
+            yield self.smshub_number_pool.client
+        else:
+            async with SmshubClient(self.smshub_api_key, metrics=self.metrics) as smshub:
+                yield smshub
 
     async def _check_phone_verification(self, page: Page):
         """Привязка номера"""
@@ -208,20 +381,25 @@ class GooglePlaywrightBrowserContext:
         next_button = page.locator(self._NEXT_BUTTON_XPATH)
         error_span = page.locator(self._ERROR_SPAN_XPATH)
 
-        if "https://accounts.google.com/speedbump/idvreenable" in await self._location_href(page):
+        if self._PHONE_VERIFICATION_URL_PATTERN.search(await self._location_href(page)):
             self.account.status = GoogleAccountStatus.PHONE_VERIFICATION_REQUIRED
+            self._journal()
 
-            if not self.smshub_api_key:
+            if not self.smshub_api_key and not self.sms_code_poller and not self.smshub_number_pool:
                 raise ValueError("No smshub API key")
 
             try:
-                async with SmshubClient(self.smshub_api_key) as smshub:
+                async with self._smshub_client() as smshub:
                     attempt = 0
                     while attempt <= self.max_attempts_to_verify_phone_number:
                         attempt += 1
                         # TODO Позволять пользователю выбирать страну
                         await country_select_menu.select_option(value='ID')  # Indonesia
-                        id, number = await smshub.request_number("go", 6)  # Indonesia
+                        with span(self.metrics, "phone.request_number"):
+                            if self.smshub_number_pool:
+                                id, number = await self.smshub_number_pool.acquire("go", 6)  # Indonesia
+                            else:
+                                id, number = await smshub.request_number("go", 6)  # Indonesia
                         print(f"({attempt}) {id}: {number}")
                         await phone_number_input_field.type(number)
                         await next_button.click()
@@ -234,7 +412,8 @@ class GooglePlaywrightBrowserContext:
                             await smshub.cancel_activation(id)
 
                     if attempt <= self.max_attempts_to_verify_phone_number:
-                        code = await smshub.wait_for_code(id)
+                        with span(self.metrics, "phone.wait_for_code"):
+                            code = await (self.sms_code_poller or smshub).wait_for_code(id)
                         await code_input_field.type(code)
                         await next_button.click()
                         return
@@ -242,80 +421,249 @@ class GooglePlaywrightBrowserContext:
                 pass
             raise PhoneVerificationRequired("Phone verification required.")
 
-    async def _check_captcha_and_type_password(self, page: Page, login: bool = True):
-        recaptcha_iframe = page.locator(self._RECAPTCHA_IFRAME_XPATH)
-        await page.wait_for_load_state("networkidle")
+    async def _captcha_task(self, page: Page) -> CaptchaTask:
+        src = await page.locator(self._RECAPTCHA_IFRAME_XPATH).get_attribute("src") or ""
+        src_url = URL(src)
+        sitekey = src_url.query.get("k")
+        if not sitekey:
+            raise CaptchaRequired("Failed to login Google account: captcha required (no sitekey).")
+        return CaptchaTask(
+            sitekey=sitekey,
+            page_url=page.url,
+            enterprise="/enterprise/" in src_url.path,
+            invisible=src_url.query.get("size") == "invisible",
+        )
+
+    async def _solve_captcha_with_queue(self, page: Page):
+        task = await self._captcha_task(page)
+        timeout = self.time_to_solve_captcha / 1000 if self.time_to_solve_captcha else None
+        try:
+            with span(self.metrics, "captcha.solver"):
+                token = await self.captcha_queue.solve(task, timeout)
+        except (TimeoutError, CaptchaSolvingError):
+            raise CaptchaRequired("Failed to login Google account: captcha required.") from None
+        await page.evaluate(self._INJECT_RECAPTCHA_TOKEN_SCRIPT, token)
+        await page.locator(self._RIGHT_BUTTON_XPATH).click()
+
+    async def _solve_captcha(self, page: Page):
+        self.account.status = GoogleAccountStatus.CAPTCHA_REQUIRED
+
+        if self.captcha_queue is not None:
+            await self._solve_captcha_with_queue(page)
+            return
+
+        if self.wait_for_captcha_solving:
+            try:
+                recaptcha_iframe = page.locator(self._RECAPTCHA_IFRAME_XPATH)
+                recaptcha_frame_name = await recaptcha_iframe.get_attribute("name")
+                recaptcha = page.frame(name=recaptcha_frame_name)
+                print("жду решения рекапчи")
+                await recaptcha.locator(self._RECAPTCHA_CHECKBOX_CHECKED_XPATH).wait_for(
+                    timeout=self.time_to_solve_captcha)
+                await page.locator(self._RIGHT_BUTTON_XPATH).click()
+                return
+            except PlaywrightTimeoutError:
+                pass
+        raise CaptchaRequired("Failed to login Google account: captcha required.")
+
+    def _page_state_waiters(
+            self,
+            page: Page,
+            state: PageState,
+            *,
+            hidden: bool = False,
+            timeout: int = None,
+    ) -> list[Awaitable]:
+        """
+        Корутины, завершающиеся когда страница перейдет в состояние state (или выйдет из него, если hidden=True).
+        """
+        waiters = []
+        xpath = self._PAGE_STATE_XPATHS.get(state)
+        if xpath:
+            waiters.append(page.locator(xpath).wait_for(state="hidden" if hidden else "visible", timeout=timeout))
+        url_patterns = self._PAGE_STATE_URL_PATTERNS.get(state)
+        if url_patterns:
+            def url_matches(url: str) -> bool:
+                return any(url_pattern.search(url) for url_pattern in url_patterns) != hidden
+            waiters.append(page.wait_for_url(url_matches, wait_until="commit", timeout=timeout))
+        return waiters
+
+    async def _detect_page_state(
+            self,
+            page: Page,
+            states: Sequence[PageState],
+            *,
+            redirected: asyncio.Event = None,
+    ) -> PageState:
+        """
+        Одновременно ждет признаки всех состояний из states и возвращает первое наступившее.
+        Если признаки появились одновременно, побеждает состояние, стоящее в states раньше.
+        Если за time_to_wait ничего не наступило, возвращает VERIFY_ON_DEVICE или UNKNOWN.
+        """
+        labels = []
+        waiters = []
+        if redirected:
+            labels.append(PageState.REDIRECTED)
+            waiters.append(redirected.wait())
+        for state in states:
+            state_waiters = self._page_state_waiters(page, state, timeout=self.time_to_wait)
+            labels.extend([state] * len(state_waiters))
+            waiters.extend(state_waiters)
+
         try:
-            await recaptcha_iframe.wait_for(timeout=self.time_to_wait)
-            self.account.status = GoogleAccountStatus.CAPTCHA_REQUIRED
+            return labels[await race(*waiters)]
         except PlaywrightTimeoutError:
             pass
 
-        if self.account.status == GoogleAccountStatus.CAPTCHA_REQUIRED:
-            if self.wait_for_captcha_solving:
-                try:
-                    recaptcha_frame_name = await recaptcha_iframe.get_attribute("name")
-                    recaptcha = page.frame(name=recaptcha_frame_name)
-                    print("жду решения рекапчи")
-                    await recaptcha.locator(self._RECAPTCHA_CHECKBOX_CHECKED_XPATH).wait_for(
-                        timeout=self.time_to_solve_captcha)
-                    await page.locator(self._RIGHT_BUTTON_XPATH).click()
+        # Только кнопка "Try another way", без "Next": просят подтвердить вход на другом устройстве
+        if (await page.locator(self._LEFT_BUTTON_XPATH).count() > 0
+                and await page.locator(self._RIGHT_BUTTON_XPATH).count() == 0):
+            return PageState.VERIFY_ON_DEVICE
+        return PageState.UNKNOWN
+
+    async def _leave_page_state(self, page: Page, state: PageState):
+        try:
+            await race(*self._page_state_waiters(page, state, hidden=True, timeout=self.time_to_wait))
+        except PlaywrightTimeoutError:
+            raise FailedToLogin(f"Failed to login Google account: stuck on {state} page.") from None
+
+    async def _pass_challenges(
+            self,
+            page: Page,
+            states: Sequence[PageState],
+            *,
+            redirected: asyncio.Event = None,
+    ) -> PageState:
+        """
+        Проходит промежуточные страницы (капча, пароль, recovery email, passkey, номер телефона)
+        как конечный автомат, пока не наступит конечное состояние.
+        :return: LOGGED_IN, CONSENT, REDIRECTED или UNKNOWN.
+        """
+        for _ in range(self._MAX_PAGE_STATE_TRANSITIONS):
+            with span(self.metrics, "page_state.detect") as detect_span:
+                state = await self._detect_page_state(page, states, redirected=redirected)
+                detect_span.outcome = state
+
+            if state not in self._PAGE_STATE_HANDLED:
+                return state
+
+            # Шаг включает и ожидание ухода со страницы
+            with span(self.metrics, "page_state", state):
+                if state == PageState.CAPTCHA:
+                    await self._solve_captcha(page)
+                elif state == PageState.PASSWORD:
                     await self._type_password_with_confirmation(page)
-                    await self._check_recovery_email_verification(page)
+                elif state == PageState.RECOVERY_EMAIL:
+                    await self._pass_recovery_email_verification(page)
+                elif state in (PageState.RECOVERY_REQUIRED, PageState.VERIFY_ON_DEVICE):
+                    self._raise_recovery_required(state)
+                elif state == PageState.PASSKEY:
+                    # Not now button
+                    await page.locator(self._LEFT_BUTTON_XPATH).click(timeout=self.time_to_wait)
+                elif state == PageState.PHONE_VERIFICATION:
                     await self._check_phone_verification(page)
-                    return
-                except PlaywrightTimeoutError:
-                    pass
-            raise CaptchaRequired("Failed to login Google account: captcha required.")
-        elif login:
-            await self._type_password_with_confirmation(page)
-            await self._check_recovery_email_verification(page)
+
+                await self._leave_page_state(page, state)
+
+        return PageState.UNKNOWN
+
+    async def export_storage_state(self) -> dict:
+        """
+        Снимок cookies и localStorage контекста в формате Playwright storage state.
+        """
+        return await self._context.storage_state()
+
+    async def import_storage_state(self, storage_state: dict):
+        """
+        Загружает снимок в уже созданный контекст.
+        Cookies добавляются сразу, localStorage - при открытии страницы соответствующего origin.
+        Если контекст создан с этим снимком (BasePlaywrightBrowser.new_context(storage_state=...)), вызывать не нужно.
+        """
+        if storage_state.get("cookies"):
+            await self._context.add_cookies(storage_state["cookies"])
+        if storage_state.get("origins"):
+            await self._context.add_init_script(script=self._RESTORE_LOCAL_STORAGE_SCRIPT.replace(
+                "ORIGINS", json.dumps(storage_state["origins"])))
 
     async def login(self):
-        if self.account.cookies:
-            if not are_valid_google_cookies(self.account.cookies):
+        with span(self.metrics, "login") as login_span:
+            try:
+                await self._login()
+            except Exception:
+                self._journal()
+                raise
+            else:
+                if self.account.status == GoogleAccountStatus.GOOD:
+                    self._journal(cookies=self.account.cookies)
+                else:
+                    self._journal()
+            finally:
+                login_span.outcome = self.account.status
+
+    async def _login(self):
+        # Каждое чтение cookies и storage_state у CompactGoogleAccount - распаковка, поэтому читаем по разу
+        storage_state = self.account.storage_state
+        cookies = self.account.cookies if not storage_state else None
+        if self.session_store is not None and not (cookies or storage_state):
+            self.session_store.restore(self.account)
+            storage_state = self.account.storage_state
+            cookies = self.account.cookies if not storage_state else None
+
+        # Полный снимок восстанавливает и localStorage, поэтому Google реже просит дополнительные проверки
+        if storage_state:
+            if are_valid_google_cookies(storage_state.get("cookies") or []):
+                if not self.storage_state_imported:
+                    await self.import_storage_state(storage_state)
+                self.account.status = GoogleAccountStatus.GOOD
+                self._logged_in = True
+                return
+            self.account.storage_state = None
+            cookies = self.account.cookies
+
+        if cookies:
+            if not are_valid_google_cookies(cookies):
                 self.account.status = GoogleAccountStatus.BAD_COOKIES
+                if self.session_store is not None:
+                    self.session_store.delete(self.account.email)
                 return
 
-            await self._context.add_cookies(self.account.cookies)
+            await self._context.add_cookies(cookies)
             self.account.status = GoogleAccountStatus.GOOD
             self._logged_in = True
             return
 
         page = await self._new_page()
         try:
-            await page.goto("https://accounts.google.com/ServiceLogin")
-            await page.locator(self._EMAIL_FIELD_XPATH).type(self.account.email)
-            await page.locator(self._EMAIL_CONFIRMATION_BUTTON_XPATH).click()
-            await self._check_captcha_and_type_password(page)
-
-            # Иногда просит установить passkey
-            if self._PASSKEY_URL_PATTERN.search(page.url):
-                # Not now button
-                await page.locator(self._LEFT_BUTTON_XPATH).click(timeout=self.time_to_wait)
-
-            await page.wait_for_load_state("load")
+            with span(self.metrics, "login.goto"):
+                await page.goto("https://accounts.google.com/ServiceLogin")
+            with span(self.metrics, "login.email"):
+                await page.locator(self._EMAIL_FIELD_XPATH).type(self.account.email)
+                await page.locator(self._EMAIL_CONFIRMATION_BUTTON_XPATH).click()
 
             cookies = None
-            for _ in range(5):
-                await page.wait_for_timeout(self.time_to_wait / 5)
-                if any(url_pattern.search(page.url) for url_pattern in self._LOGGED_IN_URL_PATTERNS):
-                    cookies = await self._context.cookies()
-                    self._logged_in = are_valid_google_cookies(cookies)
-                    break
+            storage_state = None
+            with span(self.metrics, "login.challenges") as challenges_span:
+                state = challenges_span.outcome = await self._pass_challenges(page, self._LOGIN_PAGE_STATES)
+            if state == PageState.LOGGED_IN:
+                storage_state = await self.export_storage_state()
+                cookies = storage_state["cookies"]
+                self._logged_in = are_valid_google_cookies(cookies)
 
             await page.close()
 
             if self._logged_in:
                 self.account.status = GoogleAccountStatus.GOOD
                 self.account.cookies = cookies
+                self.account.storage_state = storage_state
+                if self.session_store is not None:
+                    self.session_store.save(self.account)
             else:
                 self.account.status = GoogleAccountStatus.UNKNOWN
                 raise FailedToLogin("Failed to login Google account: failed to catch auth cookies.")
 
-        except PlaywrightTimeoutError:
+        except PlaywrightTimeoutError as exc:
             await page.close()
-            raise FailedToLogin("Failed to login Google account: unexpected TimeoutError.")
+            raise FailedToLogin("Failed to login Google account: unexpected TimeoutError.") from exc
 
     async def oauth2(
             self,
@@ -352,10 +700,16 @@ class GooglePlaywrightBrowserContext:
         }
         if prompt: params["prompt"] = prompt
         oauth_url = str(URL(oauth_url).with_query(params))
+
+        with span(self.metrics, "oauth2"):
+            return await self._oauth2(oauth_url, redirect_uri, response_type)
+
+    async def _oauth2(self, oauth_url: str, redirect_uri: str, response_type: str) -> tuple[str, str]:
         page = await self._new_page()
 
         oauth_code = None
         redirect_url = None
+        redirected = asyncio.Event()
 
         async def request_handler(request: Request):
             nonlocal oauth_code
@@ -366,27 +720,72 @@ class GooglePlaywrightBrowserContext:
             if request.url.startswith(redirect_uri):
                 redirect_url = URL(request.url)
                 oauth_code = redirect_url.query.get(response_type)
+                redirected.set()
 
         page.on("request", request_handler)
 
+        account_button = page.locator(self._account_button_xpath())
+        continue_button = page.locator(self._CONTINUE_BUTTON_XPATH)
+
         try:
-            await page.goto(oauth_url)
+            with span(self.metrics, "oauth2.goto"):
+                await page.goto(oauth_url)
             # TODO Поведение страницы может отличаться, если значение prompt != "consent"
-            await page.wait_for_timeout(self.time_to_wait)
-            await page.locator(self._account_button_xpath()).click()
-            await self._check_captcha_and_type_password(page, login=False)
-            try:
-                await page.locator(self._CONTINUE_BUTTON_XPATH).click(timeout=self.time_to_wait)
-            except PlaywrightTimeoutError:
-                pass
-            await page.wait_for_timeout(self.time_to_wait)
-        except PlaywrightTimeoutError:
+            # Если доступ уже был выдан, гугл может сделать редирект сразу, без выбора аккаунта
+            with span(self.metrics, "oauth2.account_button"):
+                already_redirected = await self._wait_for_redirect(redirected, account_button.wait_for())
+            if not already_redirected:
+                await account_button.click()
+                with span(self.metrics, "oauth2.challenges") as challenges_span:
+                    state = challenges_span.outcome = await self._pass_challenges(
+                        page, self._OAUTH2_PAGE_STATES, redirected=redirected)
+                if state == PageState.CONSENT:
+                    await continue_button.click()
+                with span(self.metrics, "oauth2.redirect"):
+                    try:
+                        await asyncio.wait_for(redirected.wait(), self.time_to_wait / 1000)
+                    except TimeoutError:
+                        pass
+        except PlaywrightTimeoutError as exc:
             await page.close()
-            raise FailedToOAuth2("Failed to OAuth2 Google account: unexpected TimeoutError.")
+            raise FailedToOAuth2("Failed to OAuth2 Google account: unexpected TimeoutError.") from exc
 
         await page.close()
 
         if not oauth_code:
             raise FailedToOAuth2("Failed to OAuth2 Google account: Failed to catch oauth code.")
 
+        self._journal(oauth_code=oauth_code, redirect_url=str(redirect_url))
         return oauth_code, str(redirect_url)
+
+    async def oauth2_many(
+            self,
+            oauth2_params: Iterable[dict],
+            *,
+            concurrency: int = 5,
+    ) -> dict[str, tuple[str, str] | Exception]:
+        """
+        Получает OAuth2 коды для нескольких приложений в одном залогиненном контексте,
+        открывая до concurrency страниц одновременно.
+        Ошибка одного приложения не прерывает остальные: вместо результата возвращается исключение.
+
+        :param oauth2_params: Наборы параметров для метода oauth2, client_id не должны повторяться.
+        :return: {client_id: (oauth_code, redirect_url) или исключение}
+        """
+        oauth2_params = list(oauth2_params)
+        client_ids = [params["client_id"] for params in oauth2_params]
+        if len(set(client_ids)) != len(client_ids):
+            raise ValueError("client_id must be unique")
+
+        # Вход один раз до открытия страниц, иначе каждая страница начнет свой вход
+        if not self._logged_in:
+            await self.login()
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def oauth2(params: dict):
+            async with semaphore:
+                return await self.oauth2(**params)
+
+        results = await asyncio.gather(*(oauth2(params) for params in oauth2_params), return_exceptions=True)
+        return dict(zip(client_ids, results))
@@ -0,0 +1,152 @@
+import asyncio
+from dataclasses import dataclass, field
+from itertools import cycle
+from typing import Iterable
+
+from better_proxy import Proxy
+from curl_cffi import CurlError
+from curl_cffi.requests.cookies import Cookies
+from twitter.base import BaseAsyncSession
+
+from .account import AnyGoogleAccount, GoogleAccountStatus
+from .utils import GOOGLE_AUTH_COOKIES, check_cookies
+from ..sessions import SessionPool
+
+
+def _cookie_header(cookies: list[dict], host: str) -> str:
+    """
+    Собирает заголовок Cookie из cookies в формате Playwright для запроса на host.
+    """
+    pairs = []
+    for cookie in cookies:
+        domain = cookie.get("domain", "").lstrip(".")
+        if host == domain or host.endswith("." + domain):
+            pairs.append(f"{cookie['name']}={cookie['value']}")
+    return "; ".join(pairs)
+
+
+class _RequestOnlyCookies(Cookies):
+    """
+    Cookie jar, не сохраняющий cookies из ответов.
+    Cookies аккаунта передаются заголовком, поэтому одну сессию могут одновременно использовать
+    проверки разных аккаунтов, не подмешивая друг другу полученные cookies.
+    """
+
+    def update_cookies_from_curl(self, morsels):
+        pass
+
+
+@dataclass
+class CookiesCheckResult:
+    alive: list[AnyGoogleAccount] = field(default_factory=list)
+    dead: list[AnyGoogleAccount] = field(default_factory=list)
+    # Проверить не удалось (сетевая ошибка, прокси): статус не меняется
+    unknown: list[AnyGoogleAccount] = field(default_factory=list)
+
+
+class GoogleCookiesChecker:
+    """
+    Проверка живости сессий Google без браузера, запросом ListAccounts через curl_cffi:
+        - Локально просроченные cookies отбрасываются без запроса.
+        - Живым аккаунтам ставится статус GOOD, мертвым - BAD_COOKIES.
+        - Только мертвые сессии нужно отправлять на дорогой вход через браузер.
+    """
+    LIST_ACCOUNTS_URL = "https://accounts.google.com/ListAccounts"
+
+    def __init__(
+            self,
+            *,
+            concurrency: int = 50,
+            timeout: float = 15,
+            session_pool: SessionPool = None,
+    ):
+        """
+        :param concurrency: Максимальное количество одновременных запросов.
+        :param session_pool: Пул сессий для check_many. Сессии пула не сохраняют cookies из ответов,
+         поэтому пул не стоит делить с другими клиентами. По умолчанию на каждый вызов создается свой.
+        """
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.session_pool = session_pool
+
+    async def check(
+            self,
+            account: AnyGoogleAccount,
+            proxy: str | Proxy = None,
+            *,
+            session: BaseAsyncSession = None,
+    ) -> bool | None:
+        """
+        :param session: Сессия для запроса (должна быть с тем же прокси). По умолчанию создается временная.
+         Сессия перестает сохранять cookies из ответов, зато ее можно использовать для нескольких проверок одновременно.
+        :return: True - сессия жива, False - мертва, None - проверить не удалось.
+        """
+        cookies = account.cookies
+        if not cookies and (storage_state := account.storage_state):
+            cookies = storage_state.get("cookies")
+        if not cookies or not check_cookies(cookies, GOOGLE_AUTH_COOKIES):
+            account.status = GoogleAccountStatus.BAD_COOKIES
+            return False
+
+        own_session = session is None
+        if own_session:
+            session = BaseAsyncSession(proxy=proxy)
+        # Cookies, полученные в ответе для другого аккаунта, не должны уйти с этим запросом
+        if not isinstance(session.cookies, _RequestOnlyCookies):
+            session.cookies = _RequestOnlyCookies()
+        try:
+            response = await session.get(
+                self.LIST_ACCOUNTS_URL,
+                params={"gpsia": "1", "source": "ChromiumBrowser", "json": "standard"},
+                headers={"cookie": _cookie_header(cookies, "accounts.google.com")},
+                timeout=self.timeout,
+            )
+        except CurlError:
+            return None
+        finally:
+            if own_session:
+                session.close()
+
+        if response.status_code != 200:
+            return None
+
+        # В ответе перечислены аккаунты, в которые выполнен вход
+        alive = account.email.lower() in response.text.lower()
+        account.status = GoogleAccountStatus.GOOD if alive else GoogleAccountStatus.BAD_COOKIES
+        return alive
+
+    async def check_many(
+            self,
+            accounts: Iterable[AnyGoogleAccount],
+            *,
+            proxies: Iterable[str | Proxy] = None,
+    ) -> CookiesCheckResult:
+        """
+        :param proxies: Прокси, раздаваемые аккаунтам по кругу.
+        """
+        proxies = [Proxy.from_str(proxy) for proxy in proxies] if proxies else None
+        pairs = zip(accounts, cycle(proxies) if proxies else cycle((None, )))
+        result = CookiesCheckResult()
+        # Сессии с одним прокси общие для всех воркеров, неиспользуемые закрываются пулом
+        session_pool = self.session_pool or SessionPool(max_clients=self.concurrency, max_sessions=self.concurrency)
+
+        async def worker():
+            for account, proxy in pairs:
+                session = await session_pool.acquire(proxy=proxy)
+                try:
+                    alive = await self.check(account, proxy, session=session)
+                finally:
+                    session_pool.release(session)
+                if alive is None:
+                    result.unknown.append(account)
+                elif alive:
+                    result.alive.append(account)
+                else:
+                    result.dead.append(account)
+
+        try:
+            await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        finally:
+            if self.session_pool is None:
+                session_pool.close()
+        return result
@@ -0,0 +1,141 @@
+import json
+import os
+import time
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from .account import AnyGoogleAccount, GoogleAccountStatus
+
+
+# Статусы, после которых действие над аккаунтом повторять бесполезно
+DEFAULT_FINISHED_STATUSES = frozenset({
+    GoogleAccountStatus.BANNED,
+    GoogleAccountStatus.RECOVERY_REQUIRED,
+    GoogleAccountStatus.RECOVERY_EMAIL_REQUIRED,
+})
+
+
+class GoogleAccountsJournal:
+    """
+    Журнал переходов статусов аккаунтов, устойчивый к падениям:
+        - Каждая запись - одна строка `email<TAB>status<TAB>done<TAB>time<TAB>json`, дописываемая в конец файла.
+          done=1 только у записи о завершении действия (finish), промежуточные шаги пишутся с done=0.
+        - При открытии строится индекс email -> (последний статус, завершен ли, смещение записи),
+          для этого JSON с артефактами не разбирается.
+        - Оборванная при падении последняя строка пропускается.
+    """
+
+    def __init__(
+            self,
+            filepath: Path | str,
+            *,
+            finished_statuses: Iterable[GoogleAccountStatus] = DEFAULT_FINISHED_STATUSES,
+            fsync: bool = False,
+    ):
+        """
+        :param finished_statuses: Статусы, с которыми аккаунт пропускается при возобновлении,
+         даже если действие над ним не завершилось.
+        :param fsync: Вызывать fsync после каждой записи (надежнее, но медленнее).
+        """
+        self.filepath = filepath
+        self.finished_statuses = frozenset(finished_statuses)
+        self.fsync = fsync
+        self._index: dict[str, tuple[GoogleAccountStatus, bool, int]] = {}
+        self._load_index()
+        self._file = open(filepath, "ab")
+
+    def _load_index(self):
+        if not os.path.exists(self.filepath):
+            return
+
+        valid_size = 0
+        with open(self.filepath, "rb") as file:
+            offset = 0
+            for line in file:
+                line_offset, offset = offset, offset + len(line)
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    email, status, done, _ = line.split(b"\t", 3)
+                    self._index[email.decode()] = (GoogleAccountStatus(status.decode()), done == b"1", line_offset)
+                except ValueError:
+                    continue
+                valid_size = offset
+
+        # Обрезаем оборванную запись, чтобы следующая не склеилась с ней
+        if valid_size != os.path.getsize(self.filepath):
+            os.truncate(self.filepath, valid_size)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, email: str) -> bool:
+        return email.lower() in self._index
+
+    def _write(self, account: AnyGoogleAccount, done: bool, artifacts: dict):
+        email = account.email.lower()
+        data = json.dumps(artifacts, separators=(",", ":"), default=str)
+        line = f"{email}\t{account.status}\t{int(done)}\t{time.time():.3f}\t{data}\n".encode()
+        offset = self._file.tell()
+        self._file.write(line)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self._index[email] = (GoogleAccountStatus(account.status), done, offset)
+
+    def record(self, account: AnyGoogleAccount, **artifacts):
+        """
+        Записывает промежуточный шаг: текущий статус аккаунта и полученные артефакты (cookies, oauth_code, ...).
+        Артефакты должны сериализоваться в JSON.
+        """
+        self._write(account, False, artifacts)
+
+    def finish(self, account: AnyGoogleAccount, **artifacts):
+        """
+        Записывает успешное завершение действия над аккаунтом, после этого он пропускается при возобновлении.
+        """
+        self._write(account, True, artifacts)
+
+    def status(self, email: str) -> GoogleAccountStatus | None:
+        entry = self._index.get(email.lower())
+        return entry[0] if entry else None
+
+    def is_done(self, email: str) -> bool:
+        entry = self._index.get(email.lower())
+        return entry is not None and entry[1]
+
+    def artifacts(self, email: str) -> dict | None:
+        """
+        Артефакты последней записи аккаунта. Читается только одна строка журнала.
+        """
+        entry = self._index.get(email.lower())
+        if not entry:
+            return None
+        with open(self.filepath, "rb") as file:
+            file.seek(entry[2])
+            _, _, _, _, data = file.readline().split(b"\t", 4)
+        return json.loads(data)
+
+    def is_finished(self, email: str) -> bool:
+        return self.is_done(email) or self.status(email) in self.finished_statuses
+
+    def pending(self, accounts: Iterable[AnyGoogleAccount]) -> Iterator[AnyGoogleAccount]:
+        """
+        Режим возобновления: пропускает уже обработанные аккаунты и восстанавливает их статус у остальных.
+        """
+        for account in accounts:
+            if self.is_finished(account.email):
+                continue
+            status = self.status(account.email)
+            if status is not None:
+                account.status = status
+            yield account
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,263 @@
+import asyncio
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from itertools import cycle
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable
+
+from better_proxy import Proxy
+from playwright.async_api import Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+
+from .account import AnyGoogleAccount
+from .journal import GoogleAccountsJournal
+from .browser import GooglePlaywrightBrowserContext
+from ..playwright_ import BasePlaywrightBrowser, PlaywrightBrowserPool
+from ..proxies import ProxyManager
+
+
+Action = Callable[[GooglePlaywrightBrowserContext], Awaitable[Any]]
+
+
+async def _login(google: GooglePlaywrightBrowserContext):
+    await google.login()
+
+
+# Сетевые ошибки Firefox и Chromium в сообщениях Playwright
+PROXY_ERROR_MARKERS = (
+    "NS_ERROR_PROXY",
+    "NS_ERROR_NET",
+    "NS_ERROR_CONNECTION_REFUSED",
+    "NS_ERROR_UNKNOWN_HOST",
+    "NS_ERROR_UNKNOWN_PROXY_HOST",
+    "net::ERR_",
+)
+
+
+def is_proxy_error(exception: BaseException | None) -> bool:
+    """
+    Похожа ли ошибка на проблему прокси, а не аккаунта: сетевые ошибки и таймауты Playwright.
+    Проверяются и явные причины (raise ... from exc), поэтому FailedToLogin из-за таймаута считается
+    ошибкой прокси. Неявный контекст (__context__) не учитывается: исход аккаунта, вызванный внутри except,
+    например CaptchaRequired или FailedToLogin из-за неожиданной страницы, - не ошибка прокси.
+    """
+    seen = set()
+    while exception is not None and id(exception) not in seen:
+        seen.add(id(exception))
+        if isinstance(exception, (PlaywrightTimeoutError, TimeoutError, ConnectionError)):
+            return True
+        if isinstance(exception, PlaywrightError) and any(
+                marker in exception.message for marker in PROXY_ERROR_MARKERS):
+            return True
+        exception = exception.__cause__
+    return False
+
+
+@dataclass
+class AccountResult:
+    account: AnyGoogleAccount
+    proxy: Proxy | None = None
+    result: Any = None
+    exception: Exception | None = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.exception is None
+
+
+@dataclass
+class RunnerStats:
+    started_at: float | None = None
+    finished_at: float | None = None
+    in_progress: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    total_elapsed: float = 0.0
+    statuses: Counter = field(default_factory=Counter)
+    exceptions: Counter = field(default_factory=Counter)
+
+    @property
+    def processed(self) -> int:
+        return self.succeeded + self.failed
+
+    @property
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def accounts_per_minute(self) -> float:
+        return self.processed / self.elapsed * 60 if self.elapsed else 0.0
+
+    @property
+    def average_account_time(self) -> float:
+        return self.total_elapsed / self.processed if self.processed else 0.0
+
+    def __str__(self):
+        return (f"processed={self.processed} (ok={self.succeeded}, failed={self.failed})"
+                f" in_progress={self.in_progress}"
+                f" speed={self.accounts_per_minute:.1f} acc/min"
+                f" avg={self.average_account_time:.1f}s")
+
+
+class GoogleAccountsRunner:
+    """
+    Параллельно прогоняет аккаунты через GooglePlaywrightBrowserContext:
+        - Держит не более concurrency контекстов одновременно на одном браузере.
+        - Раздает прокси по кругу или через ProxyManager, сообщая ему исход каждого аккаунта.
+        - Ошибка одного аккаунта не отменяет остальные, она сохраняется в AccountResult.
+    """
+
+    def __init__(
+            self,
+            browser: BasePlaywrightBrowser | PlaywrightBrowserPool,
+            *,
+            concurrency: int = 10,
+            context_kwargs: dict = None,
+            journal: GoogleAccountsJournal = None,
+            **google_kwargs,
+    ):
+        """
+        :param browser: Запущенный браузер или пул браузеров, из которого создаются контексты.
+        :param concurrency: Максимальное количество одновременно открытых контекстов.
+        :param context_kwargs: Параметры для BasePlaywrightBrowser.new_context.
+        :param journal: Журнал аккаунтов. Шаги login и oauth2 записываются в него по мере выполнения,
+         итог действия - после его завершения. Аккаунты, действие над которыми уже завершилось
+         или которые получили безнадежный статус (finished_statuses журнала), пропускаются.
+        :param google_kwargs: Параметры для GooglePlaywrightBrowserContext.
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+
+        self.browser = browser
+        self.concurrency = concurrency
+        self.context_kwargs = context_kwargs or {}
+        self.journal = journal
+        if journal is not None:
+            google_kwargs.setdefault("journal", journal)
+        self.google_kwargs = google_kwargs
+        self.stats = RunnerStats()
+
+    async def _process(
+            self,
+            account: AnyGoogleAccount,
+            proxy: Proxy | None,
+            action: Action,
+    ) -> AccountResult:
+        result = AccountResult(account=account, proxy=proxy)
+        start_time = time.monotonic()
+        self.stats.in_progress += 1
+        try:
+            context_kwargs = self.context_kwargs
+            google_kwargs = self.google_kwargs
+            if "storage_state" not in context_kwargs and (storage_state := account.storage_state):
+                # Прогретый аккаунт: контекст сразу создается залогиненным
+                context_kwargs = {**context_kwargs, "storage_state": storage_state}
+                google_kwargs = {**google_kwargs, "storage_state_imported": True}
+            async with self.browser.new_context(proxy=proxy, **context_kwargs) as context:
+                google = GooglePlaywrightBrowserContext(context, account, **google_kwargs)
+                result.result = await action(google)
+        except Exception as exc:
+            result.exception = exc
+        finally:
+            self.stats.in_progress -= 1
+
+        result.elapsed = time.monotonic() - start_time
+        if self.journal is not None:
+            self._record(result)
+        self.stats.total_elapsed += result.elapsed
+        self.stats.statuses[account.status] += 1
+        if result.ok:
+            self.stats.succeeded += 1
+        else:
+            self.stats.failed += 1
+            self.stats.exceptions[type(result.exception).__name__] += 1
+        return result
+
+    def _record(self, result: AccountResult):
+        # Cookies и OAuth2 коды уже записаны GooglePlaywrightBrowserContext по мере получения
+        if result.ok:
+            artifacts = {"result": result.result} if result.result is not None else {}
+            self.journal.finish(result.account, **artifacts)
+        else:
+            # Аккаунт останется в pending, если его статус не из finished_statuses журнала
+            error = f"{type(result.exception).__name__}: {result.exception}"
+            self.journal.record(result.account, error=error)
+
+    async def iter_run(
+            self,
+            accounts: Iterable[AnyGoogleAccount],
+            action: Action = _login,
+            *,
+            proxies: Iterable[str | Proxy] | ProxyManager = None,
+    ) -> AsyncIterator[AccountResult]:
+        """
+        Отдает результаты по мере завершения, а не в порядке аккаунтов.
+        Аккаунты читаются из итератора лениво, поэтому можно передавать генератор.
+
+        :param action: Корутина, вызываемая для каждого аккаунта. По умолчанию - login().
+        :param proxies: Прокси, раздаваемые аккаунтам по кругу,
+         или ProxyManager: тогда каждый аккаунт получает самый здоровый прокси на момент начала.
+         Ошибкой прокси считается is_proxy_error, задержка прокси берется только из ProxyManager.check.
+        """
+        if self.journal is not None:
+            accounts = self.journal.pending(accounts)
+        proxy_manager = None
+        if isinstance(proxies, ProxyManager):
+            proxy_manager, proxies = proxies, None
+        proxies = [Proxy.from_str(proxy) for proxy in proxies] if proxies else None
+        pairs = zip(accounts, cycle(proxies) if proxies else cycle((None, )))
+        results: asyncio.Queue[AccountResult | None] = asyncio.Queue()
+
+        async def process(account: AnyGoogleAccount, proxy: Proxy | None) -> AccountResult:
+            if proxy_manager is None:
+                return await self._process(account, proxy, action)
+
+            proxy = await proxy_manager.acquire()
+            ok = None
+            try:
+                result = await self._process(account, proxy, action)
+                ok = not is_proxy_error(result.exception)
+                return result
+            finally:
+                # При отмене прокси возвращается без оценки. Задержку не сообщаем: время аккаунта
+                # (капча, ожидание SMS) несравнимо с задержкой проверки прокси в ProxyManager.check
+                await asyncio.shield(proxy_manager.release(proxy, ok=ok))
+
+        async def worker():
+            try:
+                for account, proxy in pairs:
+                    await results.put(await process(account, proxy))
+            finally:
+                await results.put(None)
+
+        self.stats = RunnerStats(started_at=time.monotonic())
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        try:
+            finished_workers = 0
+            while finished_workers < len(workers):
+                result = await results.get()
+                if result is None:
+                    finished_workers += 1
+                    continue
+                yield result
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            self.stats.finished_at = time.monotonic()
+
+        for task in workers:
+            # Ошибки самого итератора аккаунтов не должны теряться
+            if not task.cancelled() and task.exception():
+                raise task.exception()
+
+    async def run(
+            self,
+            accounts: Iterable[AnyGoogleAccount],
+            action: Action = _login,
+            *,
+            proxies: Iterable[str | Proxy] | ProxyManager = None,
+    ) -> list[AccountResult]:
+        return [result async for result in self.iter_run(accounts, action, proxies=proxies)]
@@ -0,0 +1,146 @@
+import json
+import sqlite3
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from .account import AnyGoogleAccount
+from .utils import GOOGLE_AUTH_COOKIES, cookies_expire_at
+
+
+class GoogleSessionStore:
+    """
+    Хранилище cookies (и storage state) Google аккаунтов в SQLite:
+        - Ключ - email в нижнем регистре.
+        - Индекс по самому раннему сроку истечения cookies SID и HSID
+          позволяет быстро находить аккаунты, сессии которых скоро истекут.
+        - Записи коммитятся пачками (commit_every записей или раз в commit_interval секунд),
+          чтобы не блокировать event loop синхронным commit на каждый аккаунт.
+    """
+
+    def __init__(self, filepath: Path | str, *, commit_every: int = 100, commit_interval: float = 1.0):
+        """
+        :param commit_every: Через сколько записей делать commit.
+        :param commit_interval: Не реже скольких секунд делать commit при очередной записи.
+         Оставшиеся записи коммитятся в commit() и close().
+        """
+        self.filepath = filepath
+        self.commit_every = commit_every
+        self.commit_interval = commit_interval
+        self._pending_writes = 0
+        self._last_commit = time.monotonic()
+        self._connection = sqlite3.connect(filepath)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " email TEXT PRIMARY KEY,"
+            " cookies TEXT NOT NULL,"
+            " storage_state TEXT,"
+            " expires_at REAL,"  # NULL - сессионные cookies без срока
+            " updated_at REAL NOT NULL"
+            ")"
+        )
+        # Базы, созданные до появления storage_state
+        columns = {row[1] for row in self._connection.execute("PRAGMA table_info(sessions)")}
+        if "storage_state" not in columns:
+            self._connection.execute("ALTER TABLE sessions ADD COLUMN storage_state TEXT")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS sessions_expires_at ON sessions (expires_at)")
+        self._connection.commit()
+
+    def commit(self):
+        if self._pending_writes:
+            self._connection.commit()
+            self._pending_writes = 0
+        self._last_commit = time.monotonic()
+
+    def _written(self):
+        self._pending_writes += 1
+        if (self._pending_writes >= self.commit_every
+                or time.monotonic() - self._last_commit >= self.commit_interval):
+            self.commit()
+
+    def close(self):
+        self.commit()
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def __contains__(self, email: str) -> bool:
+        query = "SELECT 1 FROM sessions WHERE email = ?"
+        return self._connection.execute(query, (email.lower(), )).fetchone() is not None
+
+    def save_cookies(self, email: str, cookies: list[dict], storage_state: dict = None):
+        self._connection.execute(
+            "INSERT OR REPLACE INTO sessions (email, cookies, storage_state, expires_at, updated_at)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (
+                email.lower(),
+                json.dumps(cookies),
+                json.dumps(storage_state) if storage_state else None,
+                cookies_expire_at(cookies, GOOGLE_AUTH_COOKIES),
+                time.time(),
+            ),
+        )
+        self._written()
+
+    def save(self, account: AnyGoogleAccount):
+        cookies = account.cookies
+        storage_state = account.storage_state
+        if not cookies and storage_state:
+            cookies = storage_state.get("cookies")
+        if cookies:
+            self.save_cookies(account.email, cookies, storage_state)
+
+    def load_cookies(self, email: str) -> list[dict] | None:
+        query = "SELECT cookies FROM sessions WHERE email = ?"
+        row = self._connection.execute(query, (email.lower(), )).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def load_storage_state(self, email: str) -> dict | None:
+        query = "SELECT storage_state FROM sessions WHERE email = ?"
+        row = self._connection.execute(query, (email.lower(), )).fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+    def restore(self, account: AnyGoogleAccount) -> bool:
+        """
+        Подставляет сохраненные cookies и storage state в аккаунт.
+        :return: True, если сессия была найдена.
+        """
+        query = "SELECT cookies, storage_state FROM sessions WHERE email = ?"
+        row = self._connection.execute(query, (account.email.lower(), )).fetchone()
+        if not row:
+            return False
+        account.cookies = json.loads(row[0])
+        if row[1]:
+            account.storage_state = json.loads(row[1])
+        return True
+
+    def delete(self, email: str):
+        self._connection.execute("DELETE FROM sessions WHERE email = ?", (email.lower(), ))
+        self._written()
+
+    def expires_at(self, email: str) -> float | None:
+        query = "SELECT expires_at FROM sessions WHERE email = ?"
+        row = self._connection.execute(query, (email.lower(), )).fetchone()
+        return row[0] if row else None
+
+    def expiring(self, within: timedelta | float) -> list[str]:
+        """
+        Аккаунты, сессии которых истекут (или уже истекли) в ближайшие within.
+        Сессионные cookies без срока не попадают в выборку.
+
+        :param within: Интервал или количество часов.
+        :return: Email'ы, отсортированные по сроку истечения.
+        """
+        seconds = within.total_seconds() if isinstance(within, timedelta) else within * 3600
+        query = ("SELECT email FROM sessions"
+                 " WHERE expires_at IS NOT NULL AND expires_at < ?"
+                 " ORDER BY expires_at")
+        return [row[0] for row in self._connection.execute(query, (time.time() + seconds, ))]
@@ -1,5 +1,10 @@
+import asyncio
 from datetime import datetime
-from typing import Iterable
+from typing import Awaitable, Iterable
+
+
+# Cookie, по которым проверяется валидность сессии Google
+GOOGLE_AUTH_COOKIES = frozenset({"SID", "HSID"})
 
 
 def check_cookies(
@@ -22,3 +27,39 @@ def check_cookies(
 
     # Проверяем, все ли нужные cookie найдены и действительны
     return all(found_cookies.values())
+
+
+def cookies_expire_at(
+        cookies: list[dict],
+        cookies_to_check: Iterable[str],
+) -> float | None:
+    """
+    :return: Самый ранний срок истечения (Unix timestamp) среди cookies_to_check
+     или None, если все они сессионные (без срока).
+    """
+    expires = [
+        cookie['expires'] for cookie in cookies
+        if cookie['name'] in cookies_to_check and cookie.get('expires', -1) > 0
+    ]
+    return min(expires) if expires else None
+
+
+async def race(*aws: Awaitable) -> int:
+    """
+    Ждет первую завершившуюся корутину и отменяет остальные.
+    Если первая корутина завершилась с ошибкой, ошибка пробрасывается.
+    :return: Индекс завершившейся корутины.
+    """
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    # Если завершилось сразу несколько, предпочитаем успешную
+    done_tasks = [task for task in tasks if task in done]
+    winner = next((task for task in done_tasks if not task.cancelled() and not task.exception()), done_tasks[0])
+    winner.result()
+    return tasks.index(winner)
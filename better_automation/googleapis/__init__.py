@@ -1,9 +1,23 @@
-from .client import GoogleAPIsClient
-from .models import AuthToken
-from . import errors
+from typing import TYPE_CHECKING
+
+from .._lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .client import GoogleAPIsClient
+    from .models import AuthToken
+    from .tokens import AuthTokenManager
+    from . import errors
 
 __all__ = [
     "GoogleAPIsClient",
     "AuthToken",
+    "AuthTokenManager",
     "errors",
 ]
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    "GoogleAPIsClient": "client",
+    "AuthToken": "models",
+    "AuthTokenManager": "tokens",
+    "errors": "errors",
+})
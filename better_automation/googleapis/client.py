@@ -1,27 +1,82 @@
-from twitter.base import BaseClient
+import asyncio
+from collections import Counter
 
+from curl_cffi import CurlError
+
+from ..rate_limit import RateLimiter
+from ..sessions import BaseClient, SessionPool
 from .models import AuthToken
+from .retry import CircuitBreaker, backoff_delay
 from .errors import (
     HTTPException,
     BadRequest,
     Unauthorized,
     Forbidden,
     NotFound,
+    TooManyRequests,
     GoogleAPIsServerError,
+    CircuitOpen,
 )
 
 
 class GoogleAPIsClient(BaseClient):
-    def __init__(self, key: str, **session_kwargs):
-        super().__init__(**session_kwargs)
+    CREATE_AUTH_URI_URL = "https://www.googleapis.com/identitytoolkit/v3/relyingparty/createAuthUri"
+    SIGN_IN_WITH_IDP_URL = "https://identitytoolkit.googleapis.com/v1/accounts:signInWithIdp"
+    ACCOUNTS_LOOKUP_URL = "https://identitytoolkit.googleapis.com/v1/accounts:lookup"
+    SECURE_TOKEN_URL = "https://securetoken.googleapis.com/v1/token"
+
+    # Общие для всех клиентов процесса размыкатели цепи, по одному на endpoint
+    CIRCUIT_BREAKERS: dict[str, CircuitBreaker] = {}
+    # Общий ограничитель частоты запросов, например: GoogleAPIsClient.RATE_LIMITER = RateLimiter(10)
+    RATE_LIMITER: RateLimiter | None = None
+    # Общий пул сессий, например: GoogleAPIsClient.SESSION_POOL = SessionPool()
+    SESSION_POOL: SessionPool | None = None
+
+    def __init__(
+            self,
+            key: str,
+            *,
+            max_retries: int = 3,
+            backoff_base: float = 0.5,
+            backoff_max: float = 10,
+            failure_threshold: int = 5,
+            recovery_time: float = 30,
+            circuit_breakers: dict[str, CircuitBreaker] = None,
+            rate_limiter: RateLimiter = None,
+            session_pool: SessionPool = None,
+            **session_kwargs,
+    ):
+        """
+        :param max_retries: Сколько раз повторять запрос при 5xx, 429 и сетевых ошибках. 0 - не повторять.
+        :param backoff_base: Базовая задержка экспоненциального backoff в секундах.
+        :param backoff_max: Максимальная задержка между повторами в секундах.
+        :param failure_threshold: После скольких неудачных запросов подряд (5xx и сетевые ошибки, но не 429)
+         endpoint считается недоступным.
+        :param recovery_time: Сколько секунд не отправлять запросы на недоступный endpoint.
+        :param circuit_breakers: Размыкатели цепи. По умолчанию - общие GoogleAPIsClient.CIRCUIT_BREAKERS.
+        :param rate_limiter: Ограничитель частоты запросов по API ключу. По умолчанию - GoogleAPIsClient.RATE_LIMITER.
+        :param session_pool: Пул, из которого берется сессия. По умолчанию - GoogleAPIsClient.SESSION_POOL.
+        """
+        if session_pool is None:
+            session_pool = self.SESSION_POOL
+        super().__init__(session_pool=session_pool, **session_kwargs)
         self.key = key
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+        self.circuit_breakers = circuit_breakers if circuit_breakers is not None else self.CIRCUIT_BREAKERS
+        self.rate_limiter = rate_limiter or self.RATE_LIMITER
+        self.stats = Counter()  # requests, retries, failures, circuit_open
 
-    async def request(self, method, url, **kwargs):
-        params = kwargs["params"] = kwargs.get("params") or {}
-        params["key"] = self.key
-        response = await self._session.request(method, url, **kwargs)
-        data = response.json()
+    def _circuit_breaker(self, url: str) -> CircuitBreaker:
+        breaker = self.circuit_breakers.get(url)
+        if breaker is None:
+            breaker = self.circuit_breakers[url] = CircuitBreaker(self.failure_threshold, self.recovery_time)
+        return breaker
 
+    def _raise_for_status(self, response, data: dict):
         if response.status_code == 400:
             raise BadRequest(response, data)
 
@@ -34,14 +89,80 @@ class GoogleAPIsClient(BaseClient):
         if response.status_code == 404:
             raise NotFound(response, data)
 
+        if response.status_code == 429:
+            raise TooManyRequests(response, data)
+
         if response.status_code >= 500:
             raise GoogleAPIsServerError(response, data)
 
         if not 200 <= response.status_code < 300:
             raise HTTPException(response, data)
 
+    async def _request_once(self, method, url, **kwargs):
+        if self.rate_limiter:
+            await self.rate_limiter.acquire(self.key, url)
+        session = await self._checkout()
+        response = await session.request(method, url, **kwargs)
+        try:
+            data = response.json()
+        except ValueError:
+            # Например, HTML страница ошибки от балансировщика
+            data = {"error": {"message": response.text[:200], "errors": []}}
+
+        if self.rate_limiter:
+            if response.status_code == 429:
+                self.rate_limiter.on_throttled(self.key, url)
+            elif response.status_code < 400:
+                self.rate_limiter.on_success(self.key, url)
+
+        self._raise_for_status(response, data)
         return response, data
 
+    async def request(self, method, url, **kwargs):
+        params = kwargs["params"] = kwargs.get("params") or {}
+        params["key"] = self.key
+        breaker = self._circuit_breaker(url)
+
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                self.stats["circuit_open"] += 1
+                raise CircuitOpen(url, breaker.retry_after)
+
+            self.stats["requests"] += 1
+            try:
+                response, data = await self._request_once(method, url, **kwargs)
+            except (GoogleAPIsServerError, TooManyRequests, CurlError) as exc:
+                if isinstance(exc, TooManyRequests):
+                    # Квота одного ключа, а не сбой endpoint'а: ею занимаются rate_limiter и backoff,
+                    # иначе исчерпанный ключ размыкал бы цепь для всех ключей
+                    breaker.cancel_probe()
+                else:
+                    breaker.record_failure()
+                if attempt >= self.max_retries:
+                    self.stats["failures"] += 1
+                    raise
+                error = exc
+            except HTTPException:
+                # 4xx - ошибка запроса, а не endpoint'а
+                breaker.record_success()
+                raise
+            except BaseException:
+                breaker.cancel_probe()
+                raise
+            else:
+                breaker.record_success()
+                return response, data
+
+            delay = backoff_delay(attempt, self.backoff_base, self.backoff_max)
+            if isinstance(error, TooManyRequests):
+                retry_after = error.response.headers.get("retry-after")
+                if retry_after and retry_after.isdigit():
+                    delay = max(delay, float(retry_after))
+            attempt += 1
+            self.stats["retries"] += 1
+            await asyncio.sleep(delay)
+
     async def request_auth_data(
             self,
             provider_id: str,
@@ -51,7 +172,7 @@ class GoogleAPIsClient(BaseClient):
         """
         :return: auth_uri, session_id
         """
-        url = "https://www.googleapis.com/identitytoolkit/v3/relyingparty/createAuthUri"
+        url = self.CREATE_AUTH_URI_URL
         payload = {
             "providerId": provider_id,
             "continueUri": continue_uri,
@@ -65,7 +186,7 @@ class GoogleAPIsClient(BaseClient):
         return data["authUri"], data["sessionId"]
 
     async def sign_in(self, request_uri: str, session_id: str) -> tuple[dict, AuthToken]:
-        url = "https://identitytoolkit.googleapis.com/v1/accounts:signInWithIdp"
+        url = self.SIGN_IN_WITH_IDP_URL
         payload = {
             "requestUri": request_uri,
             "sessionId": session_id,
@@ -81,7 +202,7 @@ class GoogleAPIsClient(BaseClient):
         return data, auth_token
 
     async def request_account_info(self, auth_token: str):
-        url = "https://identitytoolkit.googleapis.com/v1/accounts:lookup"
+        url = self.ACCOUNTS_LOOKUP_URL
         payload = {"idToken": auth_token}
         headers = {
             'authority': 'identitytoolkit.googleapis.com',
@@ -91,12 +212,12 @@ class GoogleAPIsClient(BaseClient):
         return data
 
     async def refresh_auth_token(self, refresh_token: str) -> tuple[dict, AuthToken]:
-        url = "https://securetoken.googleapis.com/v1/token"
+        url = self.SECURE_TOKEN_URL
         payload = f"grant_type=refresh_token&refresh_token={refresh_token}"
         headers = {
             'authority': 'securetoken.googleapis.com',
             'content-type': 'application/x-www-form-urlencoded',
         }
-        response, data = await self.request("POST", url, headers=headers, json=payload)
-        auth_token = AuthToken.from_googleapis(data["access_token"], data["refresh_token"], data["expires_in"])
+        response, data = await self.request("POST", url, headers=headers, data=payload)
+        auth_token = AuthToken.from_googleapis(data["access_token"], data["refresh_token"], int(data["expires_in"]))
         return data, auth_token
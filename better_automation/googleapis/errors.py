@@ -8,7 +8,9 @@ __all__ = [
     "Unauthorized",
     "Forbidden",
     "NotFound",
+    "TooManyRequests",
     "GoogleAPIsServerError",
+    "CircuitOpen",
 ]
 
 
@@ -59,7 +61,23 @@ class NotFound(HTTPException):
     pass
 
 
+class TooManyRequests(HTTPException):
+    """Exception raised for a 429 HTTP status code.
+    """
+    pass
+
+
 class GoogleAPIsServerError(HTTPException):
     """Exception raised for a 5xx HTTP status code.
     """
     pass
+
+
+class CircuitOpen(GoogleAPIsException):
+    """Exception raised without sending a request when the endpoint is considered down.
+    """
+
+    def __init__(self, url: str, retry_after: float):
+        self.url = url
+        self.retry_after = retry_after
+        super().__init__(f"Circuit is open for {url}, retry after {retry_after:.1f}s")
@@ -0,0 +1,64 @@
+import random
+import time
+
+
+class CircuitBreaker:
+    """
+    Размыкатель цепи для одного endpoint'а:
+        - closed: запросы идут как обычно, считаются подряд идущие ошибки.
+        - open: после failure_threshold ошибок подряд запросы не отправляются recovery_time секунд.
+        - half-open: по истечении recovery_time пропускается один пробный запрос;
+          успех замыкает цепь, ошибка снова размыкает.
+    """
+
+    def __init__(self, failure_threshold: int = 5, recovery_time: float = 30):
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.recovery_time:
+            return "half-open"
+        return "open"
+
+    @property
+    def retry_after(self) -> float:
+        if self.opened_at is None:
+            return 0.0
+        return max(self.recovery_time - (time.monotonic() - self.opened_at), 0.0)
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def cancel_probe(self):
+        """Пробный запрос не показал, жив ли endpoint: отменен или уперся в квоту ключа (429)."""
+        self._probing = False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self._probing or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+
+def backoff_delay(attempt: int, base: float, max_delay: float) -> float:
+    """
+    Экспоненциальная задержка с полным джиттером: случайное значение от 0 до base * 2^attempt.
+    """
+    return random.uniform(0, min(max_delay, base * 2 ** attempt))
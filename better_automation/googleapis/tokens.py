@@ -0,0 +1,153 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Hashable
+
+from .client import GoogleAPIsClient
+from .models import AuthToken
+from .retry import backoff_delay
+
+logger = logging.getLogger(__name__)
+
+
+class AuthTokenManager:
+    """
+    Кэш AuthToken'ов с заблаговременным обновлением:
+        - Токен обновляется в фоне за refresh_margin до истечения.
+        - Одновременные запросы на обновление одного токена объединяются в один запрос.
+        - get() не ждет сети, пока токен не истек.
+        - Неудачное фоновое обновление повторяется с экспоненциальной задержкой.
+    """
+
+    def __init__(
+            self,
+            client: GoogleAPIsClient,
+            *,
+            refresh_margin: timedelta = timedelta(minutes=5),
+            min_refresh_interval: float = 30,
+            retry_backoff_base: float = 5,
+            retry_backoff_max: float = 300,
+    ):
+        """
+        :param min_refresh_interval: Не обновлять токен чаще, чем раз в столько секунд
+         (например, если refresh_margin больше времени жизни токена).
+        :param retry_backoff_base: Базовая задержка повтора неудачного фонового обновления в секундах.
+        :param retry_backoff_max: Максимальная задержка повтора в секундах.
+        """
+        self.client = client
+        self.refresh_margin = refresh_margin
+        self.min_refresh_interval = min_refresh_interval
+        self.retry_backoff_base = retry_backoff_base
+        self.retry_backoff_max = retry_backoff_max
+        self._tokens: dict[Hashable, AuthToken] = {}
+        self._refreshing: dict[Hashable, asyncio.Task] = {}
+        self._timers: dict[Hashable, asyncio.TimerHandle] = {}
+        self._failed_attempts: dict[Hashable, int] = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._tokens
+
+    def _needs_refresh(self, auth_token: AuthToken) -> bool:
+        if auth_token.expires_at is None:
+            return False
+        return datetime.now() >= auth_token.expires_at - self.refresh_margin
+
+    def _schedule(self, key: Hashable, delay: float):
+        if timer := self._timers.pop(key, None):
+            timer.cancel()
+        loop = asyncio.get_running_loop()
+        self._timers[key] = loop.call_later(delay, self._start_refresh, key)
+
+    def _schedule_refresh(self, key: Hashable, auth_token: AuthToken):
+        if auth_token.expires_at is None or not auth_token.refresh_token:
+            if timer := self._timers.pop(key, None):
+                timer.cancel()
+            return
+
+        delay = (auth_token.expires_at - self.refresh_margin - datetime.now()).total_seconds()
+        self._schedule(key, max(delay, self.min_refresh_interval))
+
+    def _start_refresh(self, key: Hashable) -> asyncio.Task:
+        self._timers.pop(key, None)
+        task = self._refreshing.get(key)
+        if task is None:
+            task = asyncio.create_task(self._refresh(key))
+            task.add_done_callback(partial(self._on_refreshed, key))
+            self._refreshing[key] = task
+        return task
+
+    def _on_refreshed(self, key: Hashable, task: asyncio.Task):
+        if task.cancelled():
+            return
+        exception = task.exception()
+        if exception is None:
+            self._failed_attempts.pop(key, None)
+            return
+        if key not in self._tokens:
+            return
+
+        attempt = self._failed_attempts.get(key, 0)
+        self._failed_attempts[key] = attempt + 1
+        delay = backoff_delay(attempt, self.retry_backoff_base, self.retry_backoff_max)
+        logger.warning("Failed to refresh auth token %r (attempt %d), retrying in %.1fs: %r",
+                       key, attempt + 1, delay, exception)
+        self._schedule(key, delay)
+
+    async def _refresh(self, key: Hashable) -> AuthToken:
+        try:
+            _, auth_token = await self.client.refresh_auth_token(self._tokens[key].refresh_token)
+            self.set(key, auth_token)
+            return auth_token
+        finally:
+            self._refreshing.pop(key, None)
+
+    def set(self, key: Hashable, auth_token: AuthToken):
+        """
+        Добавляет или заменяет токен и планирует его обновление.
+        Должен вызываться внутри запущенного event loop.
+        """
+        self._tokens[key] = auth_token
+        self._schedule_refresh(key, auth_token)
+
+    def remove(self, key: Hashable):
+        self._tokens.pop(key, None)
+        self._failed_attempts.pop(key, None)
+        if timer := self._timers.pop(key, None):
+            timer.cancel()
+        if task := self._refreshing.pop(key, None):
+            task.cancel()
+
+    async def refresh(self, key: Hashable) -> AuthToken:
+        """
+        Принудительно обновляет токен. Если обновление уже идет, ждет его.
+        """
+        return await asyncio.shield(self._start_refresh(key))
+
+    async def get(self, key: Hashable) -> AuthToken:
+        """
+        Возвращает действующий токен.
+        Ждет обновления только если токен уже истек.
+        """
+        auth_token = self._tokens[key]
+        if auth_token.expires_at is not None and auth_token.is_expired:
+            return await self.refresh(key)
+        if self._needs_refresh(auth_token) and key not in self._refreshing and key not in self._timers:
+            # Например, если таймер был отменен
+            self._start_refresh(key)
+        return auth_token
+
+    def close(self):
+        for timer in self._timers.values():
+            timer.cancel()
+        for task in self._refreshing.values():
+            task.cancel()
+        self._timers.clear()
+        self._refreshing.clear()
+        self._failed_attempts.clear()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        self.close()
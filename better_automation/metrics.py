@@ -0,0 +1,146 @@
+import json
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Any
+
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Последний - больше самой большой границы
+        self.count = 0
+        self.sum = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """
+        Оценка квантиля по границам бакетов: верхняя граница бакета, в который попал квантиль, но не больше max.
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return min(self.buckets[index], self.max) if index < len(self.buckets) else self.max
+        return self.max
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "min": round(self.min, 6) if self.count else 0.0,
+            "max": round(self.max, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "buckets": dict(zip([*map(str, self.buckets), "+Inf"], self.counts)),
+        }
+
+
+class Span:
+    """
+    Замер одного шага. Исход - "ok", имя исключения или значение, присвоенное span.outcome.
+    """
+    __slots__ = ("metrics", "step", "outcome", "_start_time")
+
+    def __init__(self, metrics: "Metrics", step: str):
+        self.metrics = metrics
+        self.step = step
+        self.outcome: str | None = None
+
+    def __enter__(self):
+        self._start_time = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        elapsed = time.perf_counter() - self._start_time
+        outcome = self.outcome or (exc_type.__name__ if exc_type else "ok")
+        self.metrics.observe(self.step, elapsed, outcome)
+
+
+class _NullSpan(nullcontext):
+    """Пустой замер для выключенных метрик: присваивание outcome игнорируется."""
+
+    def __enter__(self):
+        return self
+
+    def __setattr__(self, name, value):
+        if name != "outcome":
+            super().__setattr__(name, value)
+
+
+NULL_SPAN = _NullSpan()
+
+
+def span(metrics: "Metrics | None", *step_parts: Any) -> Span | _NullSpan:
+    """
+    Замер шага, если метрики включены. Если metrics is None, возвращает общий пустой контекст без затрат на замер.
+    Имя шага собирается из частей через точку только при включенных метриках: span(metrics, "smshub", action).
+    """
+    if metrics is None:
+        return NULL_SPAN
+    return metrics.span(".".join(map(str, step_parts)))
+
+
+class Metrics:
+    """
+    Гистограммы длительности шагов в разрезе (шаг, исход).
+    Пример:
+        with metrics.span("login.goto"):
+            await page.goto(...)
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.histograms: dict[tuple[str, str], Histogram] = {}
+
+    def span(self, step: str) -> Span:
+        return Span(self, step)
+
+    def observe(self, step: str, seconds: float, outcome: str = "ok"):
+        histogram = self.histograms.get((step, outcome))
+        if histogram is None:
+            histogram = self.histograms[(step, outcome)] = Histogram(self.buckets)
+        histogram.observe(seconds)
+
+    def snapshot(self) -> dict[str, dict[str, dict]]:
+        """
+        :return: {шаг: {исход: гистограмма}}
+        """
+        snapshot = {}
+        for (step, outcome), histogram in sorted(self.histograms.items()):
+            snapshot.setdefault(step, {})[outcome] = histogram.as_dict()
+        return snapshot
+
+    def export(self, filepath: Path | str):
+        """
+        Дописывает снимок метрик одной JSON строкой в файл.
+        """
+        with open(filepath, "a") as file:
+            file.write(json.dumps({"time": time.time(), "metrics": self.snapshot()}) + "\n")
+
+    def reset(self):
+        self.histograms.clear()
+
+    def __str__(self):
+        lines = []
+        for step, outcomes in self.snapshot().items():
+            for outcome, histogram in outcomes.items():
+                lines.append(f"{step:<40} {outcome:<28} n={histogram['count']:<6}"
+                             f" p50={histogram['p50']:.2f} p95={histogram['p95']:.2f} max={histogram['max']:.2f}")
+        return "\n".join(lines)
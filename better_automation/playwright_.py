@@ -1,7 +1,107 @@
+import asyncio
+import logging
+import os
+import re
 from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Iterable
 
-from playwright.async_api import async_playwright, Browser, Playwright
+from playwright.async_api import (
+    async_playwright,
+    Browser,
+    BrowserContext,
+    Error as PlaywrightError,
+    Page,
+    Playwright,
+    Request,
+    Route,
+)
 from better_proxy import Proxy
+from yarl import URL
+
+logger = logging.getLogger(__name__)
+
+
+class TrafficCounter:
+    """
+    Счетчик запросов и трафика контекста.
+    Размеры берутся из Request.sizes(), поэтому сжатые ответы учитываются в том виде, в каком пришли.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.blocked_requests = 0
+        self.failed_requests = 0  # Включая отмененные ResourceBlocker
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    async def on_request_finished(self, request: Request):
+        self.requests += 1
+        try:
+            sizes = await request.sizes()
+        except PlaywrightError:
+            return
+        self.bytes_sent += max(sizes["requestHeadersSize"], 0) + max(sizes["requestBodySize"], 0)
+        self.bytes_received += max(sizes["responseHeadersSize"], 0) + max(sizes["responseBodySize"], 0)
+
+    def on_request_failed(self, request: Request):
+        self.failed_requests += 1
+
+    def attach(self, target: BrowserContext | Page):
+        target.on("requestfinished", self.on_request_finished)
+        target.on("requestfailed", self.on_request_failed)
+
+    def __str__(self):
+        return (f"requests={self.requests} blocked={self.blocked_requests} failed={self.failed_requests}"
+                f" sent={self.bytes_sent / 1024:.1f}KiB received={self.bytes_received / 1024:.1f}KiB")
+
+
+class ResourceBlocker:
+    """
+    Политика маршрутизации, отменяющая необязательные запросы:
+        - По типу ресурса (картинки, шрифты, медиа, ...).
+        - По хосту (аналитика, реклама).
+        - По паттерну URL (телеметрия).
+    URL, подходящие под allow_url_patterns, пропускаются всегда.
+    """
+
+    def __init__(
+            self,
+            *,
+            resource_types: Iterable[str] = ("image", "media", "font"),
+            hosts: Iterable[str] = (),
+            url_patterns: Iterable[str | re.Pattern] = (),
+            allow_url_patterns: Iterable[str | re.Pattern] = (),
+    ):
+        self.resource_types = frozenset(resource_types)
+        self.hosts = frozenset(hosts)
+        self.url_patterns = tuple(re.compile(pattern) for pattern in url_patterns)
+        self.allow_url_patterns = tuple(re.compile(pattern) for pattern in allow_url_patterns)
+
+    def should_block(self, request: Request) -> bool:
+        url = request.url
+        if any(pattern.search(url) for pattern in self.allow_url_patterns):
+            return False
+        if request.resource_type in self.resource_types:
+            return True
+        if URL(url).host in self.hosts:
+            return True
+        return any(pattern.search(url) for pattern in self.url_patterns)
+
+    async def route(
+            self,
+            target: BrowserContext | Page,
+            traffic_counter: TrafficCounter = None,
+    ):
+        async def handler(route: Route, request: Request):
+            if self.should_block(request):
+                if traffic_counter:
+                    traffic_counter.blocked_requests += 1
+                await route.abort("blockedbyclient")
+            else:
+                await route.fallback()
+
+        await target.route("**/*", handler)
 
 
 class BasePlaywrightBrowser:
@@ -46,11 +146,144 @@ class BasePlaywrightBrowser:
             self,
             *,
             proxy: str | Proxy = None,  # TODO Принимать в Playwright формате тоже
+            storage_state: dict | Path | str = None,
+            resource_blocker: ResourceBlocker = None,
+            traffic_counter: TrafficCounter = None,
             **context_kwargs,
     ):
+        """
+        :param storage_state: Снимок cookies и localStorage (Playwright storage state) или путь до него.
+        :param resource_blocker: Политика отмены необязательных запросов.
+        :param traffic_counter: Счетчик, в который будет записываться трафик контекста.
+        """
         proxy = Proxy.from_str(proxy).as_playwright_proxy if proxy else None
-        context = await self._browser.new_context(proxy=proxy, **context_kwargs)
+        context = await self._browser.new_context(proxy=proxy, storage_state=storage_state, **context_kwargs)
         context.set_default_timeout(self.default_timeout)
         await context.add_init_script("delete Object.getPrototypeOf(navigator).webdriver")
-        yield context
-        await context.close()
+        if resource_blocker:
+            await resource_blocker.route(context, traffic_counter)
+        if traffic_counter:
+            traffic_counter.attach(context)
+        try:
+            yield context
+        finally:
+            await context.close()
+
+
+class _PooledBrowser:
+    def __init__(self, browser: BasePlaywrightBrowser):
+        self.browser = browser
+        self.active_contexts = 0
+        self.created_contexts = 0
+        self.retiring = False
+
+
+class PlaywrightBrowserPool:
+    """
+    Пул из нескольких процессов браузера (по умолчанию - по одному на ядро):
+        - Контекст создается в наименее загруженном браузере.
+        - Браузер перезапускается после max_contexts_per_browser созданных в нем контекстов.
+        - Интерфейс new_context совпадает с BasePlaywrightBrowser.
+    """
+
+    def __init__(
+            self,
+            size: int = None,
+            *,
+            max_contexts_per_browser: int = None,
+            default_timeout: int = 10_000,
+            proxy: str | Proxy = None,
+            **launch_kwargs
+    ):
+        """
+        :param size: Количество процессов браузера. По умолчанию - количество ядер.
+        :param max_contexts_per_browser: Через сколько контекстов перезапускать браузер. None - не перезапускать.
+        """
+        self.size = size or os.cpu_count() or 1
+        self.max_contexts_per_browser = max_contexts_per_browser
+        self.default_timeout = default_timeout
+        self.proxy = proxy
+        self.launch_kwargs = launch_kwargs
+        self._browsers: list[_PooledBrowser] = []
+        self._condition = asyncio.Condition()
+
+    def _new_browser(self) -> BasePlaywrightBrowser:
+        return BasePlaywrightBrowser(
+            default_timeout=self.default_timeout, proxy=self.proxy, **self.launch_kwargs)
+
+    async def create_browser(self):
+        browsers = [self._new_browser() for _ in range(self.size)]
+        await asyncio.gather(*(browser.create_browser() for browser in browsers))
+        self._browsers = [_PooledBrowser(browser) for browser in browsers]
+
+    async def close_browser(self):
+        await asyncio.gather(*(pooled.browser.close_browser() for pooled in self._browsers))
+        self._browsers = []
+
+    async def __aenter__(self):
+        await self.create_browser()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close_browser()
+
+    @property
+    def active_contexts(self) -> int:
+        return sum(pooled.active_contexts for pooled in self._browsers)
+
+    async def _acquire(self) -> _PooledBrowser:
+        async with self._condition:
+            while True:
+                if not self._browsers:
+                    raise RuntimeError("Browser pool is not started")
+                available = [pooled for pooled in self._browsers if not pooled.retiring]
+                if available:
+                    pooled = min(available, key=lambda pooled: pooled.active_contexts)
+                    pooled.active_contexts += 1
+                    pooled.created_contexts += 1
+                    if (self.max_contexts_per_browser
+                            and pooled.created_contexts >= self.max_contexts_per_browser):
+                        pooled.retiring = True
+                    return pooled
+                await self._condition.wait()
+
+    async def _release(self, pooled: _PooledBrowser):
+        pooled.active_contexts -= 1
+        if pooled.retiring and pooled.active_contexts == 0:
+            # _release вызывается из finally: ошибка перезапуска не должна подменять исключение контекста
+            try:
+                await self._recycle(pooled)
+            except Exception:
+                logger.exception("Failed to recycle browser, it is removed from the pool")
+
+    async def _recycle(self, pooled: _PooledBrowser):
+        try:
+            await pooled.browser.close_browser()
+            browser = self._new_browser()
+            await browser.create_browser()
+        except Exception:
+            # Браузер, который не удалось перезапустить, выбывает из пула
+            async with self._condition:
+                self._browsers.remove(pooled)
+                self._condition.notify_all()
+            raise
+
+        pooled.browser = browser
+        pooled.created_contexts = 0
+        async with self._condition:
+            pooled.retiring = False
+            self._condition.notify_all()
+
+    @asynccontextmanager
+    async def new_context(
+            self,
+            *,
+            proxy: str | Proxy = None,
+            **context_kwargs,
+    ):
+        pooled = await self._acquire()
+        try:
+            async with pooled.browser.new_context(proxy=proxy, **context_kwargs) as context:
+                yield context
+        finally:
+            await self._release(pooled)
@@ -0,0 +1,236 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Callable, Iterable
+
+from better_proxy import Proxy
+from curl_cffi import CurlError
+from twitter.base import BaseAsyncSession
+
+
+class ProxyScore:
+    """
+    Скользящая оценка прокси: EWMA задержки и доли неудач, текущая нагрузка и карантин.
+    """
+    __slots__ = (
+        "proxy",
+        "latency",
+        "failure_rate",
+        "successes",
+        "failures",
+        "consecutive_failures",
+        "quarantines",
+        "quarantined_until",
+        "in_use",
+    )
+
+    def __init__(self, proxy: Proxy):
+        self.proxy = proxy
+        self.latency: float | None = None
+        self.failure_rate = 0.0
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.quarantines = 0
+        self.quarantined_until = 0.0
+        self.in_use = 0
+
+    def is_quarantined(self, now: float = None) -> bool:
+        return self.quarantined_until > (now if now is not None else time.monotonic())
+
+    def __repr__(self):
+        latency = f"{self.latency * 1000:.0f}ms" if self.latency is not None else "?"
+        return (f"ProxyScore({self.proxy.as_url}, latency={latency}, failure_rate={self.failure_rate:.2f},"
+                f" in_use={self.in_use}, quarantined={self.is_quarantined()})")
+
+
+class ProxyManager:
+    """
+    Выдает контекстам самые здоровые прокси:
+        - preflight проверяет все прокси параллельно и измеряет задержку.
+        - Задержка и доля неудач сглаживаются (EWMA) по проверкам и исходам работы через прокси.
+        - Прокси с failure_threshold неудачами подряд уходит в карантин, каждый следующий карантин вдвое длиннее.
+        - acquire выбирает прокси с лучшей оценкой с учетом текущей нагрузки и ждет, если свободных нет.
+    """
+    CHECK_URL = "https://www.google.com/generate_204"
+
+    def __init__(
+            self,
+            proxies: Iterable[str | Proxy],
+            *,
+            max_uses: int = None,
+            failure_threshold: int = 3,
+            quarantine_time: float = 300,
+            max_quarantine_time: float = 3600,
+            alpha: float = 0.3,
+            default_latency: float = 1.0,
+            check_timeout: float = 10,
+            concurrency: int = 50,
+    ):
+        """
+        :param max_uses: Максимум одновременных контекстов на прокси. None - без ограничения.
+        :param failure_threshold: После скольких неудач подряд прокси уходит в карантин.
+        :param quarantine_time: Длительность первого карантина в секундах.
+        :param max_quarantine_time: Максимальная длительность карантина в секундах.
+        :param alpha: Вес нового наблюдения в EWMA задержки и доли неудач.
+        :param default_latency: Задержка, с которой оцениваются еще не проверенные прокси.
+        :param check_timeout: Таймаут проверочного запроса в секундах.
+        :param concurrency: Максимальное количество одновременных проверок.
+        """
+        self.scores: dict[str, ProxyScore] = {}
+        for proxy in proxies:
+            proxy = Proxy.from_str(proxy)
+            self.scores.setdefault(proxy.as_url, ProxyScore(proxy))
+        if not self.scores:
+            raise ValueError("No proxies")
+
+        self.max_uses = max_uses
+        self.failure_threshold = failure_threshold
+        self.quarantine_time = quarantine_time
+        self.max_quarantine_time = max_quarantine_time
+        self.alpha = alpha
+        self.default_latency = default_latency
+        self.check_timeout = check_timeout
+        self.concurrency = concurrency
+        self._released = asyncio.Condition()
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def _score(self, proxy: str | Proxy) -> ProxyScore:
+        return self.scores[Proxy.from_str(proxy).as_url]
+
+    def healthy(self) -> list[ProxyScore]:
+        """
+        Прокси вне карантина, от лучшего к худшему.
+        """
+        now = time.monotonic()
+        return sorted((score for score in self.scores.values() if not score.is_quarantined(now)), key=self._rank)
+
+    def _rank(self, score: ProxyScore) -> float:
+        latency = score.latency if score.latency is not None else self.default_latency
+        # Нагрузка учитывается, чтобы контексты распределялись, а не шли все через один быстрый прокси
+        return latency * (1 + 4 * score.failure_rate) * (1 + score.in_use)
+
+    def record_success(self, proxy: str | Proxy, latency: float = None):
+        score = self._score(proxy)
+        score.successes += 1
+        score.consecutive_failures = 0
+        score.failure_rate *= 1 - self.alpha
+        if latency is not None:
+            score.latency = latency if score.latency is None else (
+                    self.alpha * latency + (1 - self.alpha) * score.latency)
+
+    def record_failure(self, proxy: str | Proxy):
+        score = self._score(proxy)
+        score.failures += 1
+        score.consecutive_failures += 1
+        score.failure_rate = self.alpha + (1 - self.alpha) * score.failure_rate
+        if score.consecutive_failures >= self.failure_threshold:
+            quarantine_time = min(self.quarantine_time * 2 ** score.quarantines, self.max_quarantine_time)
+            score.quarantines += 1
+            score.quarantined_until = time.monotonic() + quarantine_time
+            # После карантина одной неудачи достаточно, чтобы вернуть прокси обратно
+            score.consecutive_failures = self.failure_threshold - 1
+
+    async def check(self, proxy: str | Proxy, *, session: BaseAsyncSession = None) -> float | None:
+        """
+        Проверочный запрос через прокси. Результат сразу учитывается в оценке.
+        :return: Задержка в секундах или None, если прокси не работает.
+        """
+        own_session = session is None
+        if own_session:
+            session = BaseAsyncSession(proxy=proxy)
+        start_time = time.monotonic()
+        try:
+            response = await session.get(self.CHECK_URL, timeout=self.check_timeout)
+            if response.status_code >= 400:
+                raise CurlError(f"Unexpected status code {response.status_code}")
+        except CurlError:
+            self.record_failure(proxy)
+            return None
+        finally:
+            if own_session:
+                session.close()
+
+        latency = time.monotonic() - start_time
+        self.record_success(proxy, latency)
+        return latency
+
+    async def preflight(self, proxies: Iterable[str | Proxy] = None) -> dict[str, float | None]:
+        """
+        Параллельно проверяет прокси (по умолчанию все).
+        :return: {proxy url: задержка или None}
+        """
+        proxies = [Proxy.from_str(proxy) for proxy in proxies] if proxies else [
+            score.proxy for score in self.scores.values()]
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def check(proxy: Proxy) -> float | None:
+            async with semaphore:
+                return await self.check(proxy)
+
+        latencies = await asyncio.gather(*(check(proxy) for proxy in proxies))
+        return {proxy.as_url: latency for proxy, latency in zip(proxies, latencies)}
+
+    def _select(self) -> ProxyScore | None:
+        now = time.monotonic()
+        candidates = [
+            score for score in self.scores.values()
+            if not score.is_quarantined(now) and (self.max_uses is None or score.in_use < self.max_uses)
+        ]
+        return min(candidates, key=self._rank) if candidates else None
+
+    def _wait_time(self) -> float | None:
+        """
+        Через сколько секунд закончится ближайший карантин (None, если свободный прокси появится только после release).
+        """
+        now = time.monotonic()
+        quarantined = [
+            score.quarantined_until - now for score in self.scores.values()
+            if score.is_quarantined(now) and (self.max_uses is None or score.in_use < self.max_uses)
+        ]
+        return min(quarantined) if quarantined else None
+
+    async def acquire(self) -> Proxy:
+        """
+        Лучший доступный прокси. Если все в карантине или заняты, ждет освобождения.
+        Каждый acquire должен завершаться release.
+        """
+        async with self._released:
+            while (score := self._select()) is None:
+                try:
+                    await asyncio.wait_for(self._released.wait(), self._wait_time())
+                except TimeoutError:
+                    pass
+            score.in_use += 1
+            return score.proxy
+
+    async def release(self, proxy: str | Proxy, *, ok: bool = None, latency: float = None):
+        """
+        :param ok: Исход работы через прокси: True - успех, False - ошибка прокси, None - не учитывать.
+        """
+        if ok is True:
+            self.record_success(proxy, latency)
+        elif ok is False:
+            self.record_failure(proxy)
+        async with self._released:
+            self._score(proxy).in_use -= 1
+            self._released.notify()
+
+    @asynccontextmanager
+    async def lease(self, is_proxy_error: Callable[[BaseException], bool] = None):
+        """
+        async with manager.lease() as proxy: ...
+        Ошибка внутри блока считается ошибкой прокси, если is_proxy_error(exc) (по умолчанию - любая ошибка).
+        """
+        proxy = await self.acquire()
+        ok = None
+        try:
+            yield proxy
+            ok = True
+        except Exception as exc:
+            ok = not (is_proxy_error or (lambda _: True))(exc)
+            raise
+        finally:
+            await asyncio.shield(self.release(proxy, ok=ok))
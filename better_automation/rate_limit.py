@@ -0,0 +1,81 @@
+import asyncio
+import time
+from typing import Hashable
+
+
+class TokenBucket:
+    """
+    Token bucket: в среднем rate запросов в секунду, всплески до burst запросов.
+    Ожидающие обслуживаются по очереди.
+    """
+
+    def __init__(self, rate: float, burst: float = None):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1)
+        self._tokens = self.burst
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self, tokens: float = 1):
+        async with self._lock:
+            self._refill()
+            if self._tokens < tokens:
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= tokens
+
+
+class RateLimiter:
+    """
+    Ограничитель частоты запросов, общий для всех клиентов, которым он передан:
+        - Отдельный TokenBucket на каждый API ключ (и endpoint, если per_endpoint=True).
+        - adaptive=True: при сигнале о превышении лимита (например, 429) скорость ключа снижается вдвое,
+          затем после каждого успешного запроса плавно возвращается к rate.
+    """
+
+    def __init__(
+            self,
+            rate: float,
+            *,
+            burst: float = None,
+            per_endpoint: bool = False,
+            adaptive: bool = False,
+            min_rate: float = None,
+    ):
+        """
+        :param rate: Запросов в секунду на один ключ.
+        :param burst: Размер всплеска. По умолчанию - rate.
+        :param per_endpoint: Считать лимит отдельно для каждого endpoint'а.
+        :param min_rate: Нижняя граница скорости при adaptive=True. По умолчанию - rate / 10.
+        """
+        self.rate = rate
+        self.burst = burst
+        self.per_endpoint = per_endpoint
+        self.adaptive = adaptive
+        self.min_rate = min_rate if min_rate is not None else rate / 10
+        self._buckets: dict[Hashable, TokenBucket] = {}
+
+    def bucket(self, key: Hashable, endpoint: str = None) -> TokenBucket:
+        bucket_key = (key, endpoint) if self.per_endpoint else key
+        bucket = self._buckets.get(bucket_key)
+        if bucket is None:
+            bucket = self._buckets[bucket_key] = TokenBucket(self.rate, self.burst)
+        return bucket
+
+    async def acquire(self, key: Hashable, endpoint: str = None):
+        await self.bucket(key, endpoint).acquire()
+
+    def on_success(self, key: Hashable, endpoint: str = None):
+        if self.adaptive:
+            bucket = self.bucket(key, endpoint)
+            bucket.rate = min(self.rate, bucket.rate + self.rate * 0.05)
+
+    def on_throttled(self, key: Hashable, endpoint: str = None):
+        if self.adaptive:
+            bucket = self.bucket(key, endpoint)
+            bucket.rate = max(self.min_rate, bucket.rate / 2)
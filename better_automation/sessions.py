@@ -0,0 +1,132 @@
+import asyncio
+import copy
+from collections import OrderedDict
+
+import twitter.base
+from better_proxy import Proxy
+from twitter.base import BaseAsyncSession
+
+
+SessionKey = tuple[str | None, str | None]  # proxy, impersonate
+
+
+class SessionPool:
+    """
+    Пул curl_cffi сессий, общих для многих клиентов:
+        - Одна сессия на пару (прокси, профиль impersonate), поэтому клиенты с одинаковым прокси
+          переиспользуют уже установленные keep-alive / HTTP/2 соединения.
+        - Каждая сессия держит не более max_clients одновременных соединений.
+        - Одновременно используется не более max_sessions сессий, остальные клиенты ждут в acquire,
+          поэтому всего открыто не более (max_sessions + max_idle_sessions) * max_clients соединений.
+        - Неиспользуемые сессии сверх max_idle_sessions закрываются, начиная с самой давней.
+    """
+
+    def __init__(
+            self,
+            *,
+            max_clients: int = 10,
+            max_sessions: int = 64,
+            max_idle_sessions: int = 16,
+            **session_kwargs,
+    ):
+        """
+        :param max_clients: Максимум одновременных соединений в одной сессии.
+        :param max_sessions: Максимум одновременно используемых сессий (разных прокси).
+        :param max_idle_sessions: Сколько неиспользуемых сессий держать открытыми.
+        :param session_kwargs: Общие параметры всех сессий (headers, timeout, ...).
+        """
+        self.max_clients = max_clients
+        self.max_sessions = max_sessions
+        self.max_idle_sessions = max_idle_sessions
+        self.session_kwargs = session_kwargs
+        self._slots = asyncio.Semaphore(max_sessions)
+        self._sessions: dict[SessionKey, BaseAsyncSession] = {}
+        self._borrowers: dict[SessionKey, int] = {}
+        self._idle: OrderedDict[SessionKey, None] = OrderedDict()
+
+    @staticmethod
+    def _key(proxy: str | Proxy = None, impersonate: str = None) -> SessionKey:
+        proxy = Proxy.from_str(proxy).as_url if proxy else None
+        return proxy, str(impersonate) if impersonate else None
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    async def acquire(self, *, proxy: str | Proxy = None, impersonate: str = None) -> BaseAsyncSession:
+        key = self._key(proxy, impersonate)
+        if key not in self._borrowers:
+            await self._slots.acquire()
+            if key in self._borrowers:
+                # Пока ждали, эту же сессию взял другой клиент
+                self._slots.release()
+        session = self._sessions.get(key)
+        if session is None:
+            # BaseAsyncSession дополняет переданные headers, поэтому общие параметры копируются целиком
+            session_kwargs = copy.deepcopy(self.session_kwargs)
+            if impersonate:
+                session_kwargs["impersonate"] = impersonate
+            session = BaseAsyncSession(proxy=proxy, max_clients=self.max_clients, **session_kwargs)
+            self._sessions[key] = session
+        self._borrowers[key] = self._borrowers.get(key, 0) + 1
+        self._idle.pop(key, None)
+        return session
+
+    def release(self, session: BaseAsyncSession):
+        key = next((key for key, pooled in self._sessions.items() if pooled is session), None)
+        if key is None:
+            return
+        self._borrowers[key] -= 1
+        if self._borrowers[key] > 0:
+            return
+
+        del self._borrowers[key]
+        self._slots.release()
+        self._idle[key] = None
+        while len(self._idle) > self.max_idle_sessions:
+            idle_key, _ = self._idle.popitem(last=False)
+            self._sessions.pop(idle_key).close()
+
+    def close(self):
+        for session in self._sessions.values():
+            session.close()
+        self._sessions.clear()
+        self._borrowers.clear()
+        self._idle.clear()
+        self._slots = asyncio.Semaphore(self.max_sessions)
+
+
+class BaseClient(twitter.base.BaseClient):
+    """
+    Как twitter.base.BaseClient, но может брать сессию из SessionPool.
+    Сессия из пула берется при входе в async with или перед первым запросом (_checkout),
+    а при закрытии клиента возвращается в пул, а не закрывается.
+    """
+
+    def __init__(self, *, session_pool: SessionPool = None, **session_kwargs):
+        self._session_pool = session_pool
+        if session_pool is None:
+            super().__init__(**session_kwargs)
+            return
+
+        unsupported = set(session_kwargs) - {"proxy", "impersonate"}
+        if unsupported:
+            raise ValueError(f"Pooled sessions are shared, pass {', '.join(sorted(unsupported))}"
+                             f" to SessionPool instead")
+        self._session = None
+        self._pool_kwargs = session_kwargs
+
+    async def _checkout(self) -> BaseAsyncSession:
+        if self._session is None:
+            self._session = await self._session_pool.acquire(**self._pool_kwargs)
+        return self._session
+
+    async def __aenter__(self):
+        await self._checkout()
+        return self
+
+    def close(self):
+        if self._session_pool is None:
+            super().close()
+        elif self._session is not None:
+            self._session_pool.release(self._session)
+            self._session = None
@@ -1,7 +1,23 @@
-from .client import SmshubClient
-from . import errors
+from typing import TYPE_CHECKING
+
+from .._lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .client import SmshubClient
+    from .poller import SmshubCodePoller
+    from .numbers import SmshubNumberPool
+    from . import errors
 
 __all__ = [
     "SmshubClient",
+    "SmshubCodePoller",
+    "SmshubNumberPool",
     "errors",
 ]
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    "SmshubClient": "client",
+    "SmshubCodePoller": "poller",
+    "SmshubNumberPool": "numbers",
+    "errors": "errors",
+})
@@ -0,0 +1,137 @@
+import asyncio
+import atexit
+import copy
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+
+class TTLCache:
+    """
+    Асинхронный кэш с временем жизни записей:
+        - Одновременные запросы одного ключа объединяются в один вызов fetch.
+        - Опционально сохраняется в JSON файл, чтобы переживать перезапуск процесса.
+          Файл перезаписывается не чаще раза в dump_delay секунд, а также в flush() и при выходе.
+        - Каждый вызывающий получает свою копию значения, изменять ее безопасно.
+    """
+
+    def __init__(self, filepath: Path | str = None, *, max_size: int = 1024, dump_delay: float = 5):
+        """
+        :param filepath: JSON файл для хранения кэша на диске. None - только в памяти.
+        :param max_size: Максимальное количество записей. При переполнении удаляются самые старые.
+        :param dump_delay: Через сколько секунд после изменения записывать кэш на диск.
+        """
+        self.filepath = filepath
+        self.max_size = max_size
+        self.dump_delay = dump_delay
+        self._entries: dict[str, tuple[float, Any]] = {}  # key: (expires_at, value)
+        self._in_flight: dict[str, asyncio.Future] = {}
+        self._dirty = False
+        self._dump_handle: asyncio.TimerHandle | None = None
+        self.hits = 0
+        self.misses = 0
+        if filepath:
+            if os.path.exists(filepath):
+                self._load()
+            atexit.register(self.flush)
+
+    def _load(self):
+        try:
+            with open(self.filepath, "r") as file:
+                entries = json.load(file)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        self._entries = {key: (expires_at, value) for key, (expires_at, value) in entries.items() if expires_at > now}
+
+    def _dump(self):
+        tmp_filepath = f"{self.filepath}.tmp"
+        with open(tmp_filepath, "w") as file:
+            json.dump(self._entries, file)
+        os.replace(tmp_filepath, self.filepath)
+
+    def _schedule_dump(self):
+        if not self.filepath:
+            return
+        self._dirty = True
+        if self._dump_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        self._dump_handle = loop.call_later(self.dump_delay, self.flush)
+
+    def flush(self):
+        """
+        Сразу записывает несохраненные изменения на диск.
+        """
+        if self._dump_handle is not None:
+            self._dump_handle.cancel()
+            self._dump_handle = None
+        if self.filepath and self._dirty:
+            self._dirty = False
+            self._dump()
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        return json.dumps(parts, sort_keys=True, default=str)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return default
+        return copy.deepcopy(value)
+
+    def set(self, key: str, value: Any, ttl: float):
+        self._entries.pop(key, None)
+        self._entries[key] = (time.time() + ttl, value)
+        while len(self._entries) > self.max_size:
+            del self._entries[next(iter(self._entries))]
+        self._schedule_dump()
+
+    def invalidate(self, key: str):
+        if self._entries.pop(key, None) is not None:
+            self._schedule_dump()
+
+    def clear(self):
+        self._entries.clear()
+        self._schedule_dump()
+
+    async def get_or_fetch(self, key: str, fetch: Callable[[], Awaitable[Any]], ttl: float) -> Any:
+        """
+        Возвращает значение из кэша или вызывает fetch.
+        Если этот ключ уже запрашивается, ждет тот же запрос. ttl <= 0 - не кэшировать.
+        """
+        if ttl <= 0:
+            return await fetch()
+
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is not sentinel:
+            self.hits += 1
+            return value
+
+        future = self._in_flight.get(key)
+        if future is None:
+            self.misses += 1
+            future = self._in_flight[key] = asyncio.ensure_future(fetch())
+
+            def on_done(done_future: asyncio.Future):
+                self._in_flight.pop(key, None)
+                if not done_future.cancelled() and done_future.exception() is None:
+                    self.set(key, done_future.result(), ttl)
+
+            future.add_done_callback(on_done)
+        else:
+            self.hits += 1
+
+        # Отмена одного из ожидающих не должна отменять общий запрос
+        return copy.deepcopy(await asyncio.shield(future))
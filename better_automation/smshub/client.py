@@ -1,8 +1,11 @@
 import asyncio
+import hashlib
 import time
 
-from twitter.base import BaseClient
-
+from ..metrics import Metrics, span
+from ..rate_limit import RateLimiter
+from ..sessions import BaseClient, SessionPool
+from .cache import TTLCache
 from .errors import SmsServiceError
 
 
@@ -10,17 +13,73 @@ class SmshubClient(BaseClient):
     BASE_API_URL = "https://smshub.org/stubs/handler_api.php"
     UNOFFICIAL_API_URL = "https://smshub.org/api.php"
 
-    def __init__(self, key: str, **session_kwargs):
-        super().__init__(**session_kwargs)
+    # Время жизни ответов справочных методов в секундах. 0 - не кэшировать
+    CACHE_TTLS = {
+        "getPrices": 60,
+        "getNumbersStatus": 15,
+        "getListOfCountriesAndOperators": 3600,
+    }
+    # Общий для всех клиентов процесса кэш
+    CACHE = TTLCache()
+    # Общий ограничитель частоты запросов, например: SmshubClient.RATE_LIMITER = RateLimiter(5)
+    RATE_LIMITER: RateLimiter | None = None
+    # Общий пул сессий, например: SmshubClient.SESSION_POOL = SessionPool()
+    SESSION_POOL: SessionPool | None = None
+    # Общие метрики, например: SmshubClient.METRICS = Metrics()
+    METRICS: Metrics | None = None
+
+    def __init__(
+            self,
+            key: str,
+            *,
+            cache: TTLCache = None,
+            cache_ttls: dict[str, float] = None,
+            rate_limiter: RateLimiter = None,
+            session_pool: SessionPool = None,
+            metrics: Metrics = None,
+            **session_kwargs,
+    ):
+        """
+        :param cache: Кэш справочных методов. По умолчанию - общий SmshubClient.CACHE.
+        :param cache_ttls: Переопределение CACHE_TTLS для этого клиента.
+        :param rate_limiter: Ограничитель частоты запросов по API ключу. По умолчанию - SmshubClient.RATE_LIMITER.
+        :param session_pool: Пул, из которого берется сессия. По умолчанию - SmshubClient.SESSION_POOL.
+        :param metrics: Метрики, в которые записывается длительность запросов (шаг smshub.<action>).
+         По умолчанию - SmshubClient.METRICS.
+        """
+        if session_pool is None:
+            session_pool = self.SESSION_POOL
+        super().__init__(session_pool=session_pool, **session_kwargs)
         self.key = key
+        # API ключ не должен попадать в ключи кэша, который может сохраняться на диск
+        self._cache_namespace = hashlib.sha256(key.encode()).hexdigest()
+        self.cache = cache if cache is not None else self.CACHE
+        self.cache_ttls = {**self.CACHE_TTLS, **(cache_ttls or {})}
+        self.rate_limiter = rate_limiter or self.RATE_LIMITER
+        self.metrics = metrics if metrics is not None else self.METRICS
+
+    async def _cached_json(self, action: str, method: str, url: str, params: dict):
+        async def fetch():
+            response = await self._request(method, url, params=dict(params))
+            return response.json()
+
+        key = TTLCache.make_key(self._cache_namespace, url, params)
+        return await self.cache.get_or_fetch(key, fetch, self.cache_ttls.get(action, 0))
 
     async def _request(self, method: str, url: str, **kwargs):
         params = kwargs["params"] = kwargs.get("params") or {}
         params["api_key"] = self.key
-        response = await self._session.request(method, url, **kwargs)
-
-        if response.text.startswith('ERROR'):
-            raise SmsServiceError(response.text)
+        action = params.get("action") or params.get("asc")
+        if self.rate_limiter:
+            await self.rate_limiter.acquire(self.key, action)
+        with span(self.metrics, "smshub", action) as request_span:
+            session = await self._checkout()
+            response = await session.request(method, url, **kwargs)
+
+            if response.text.startswith('ERROR'):
+                # Только код ошибки: тело может содержать произвольный текст
+                request_span.outcome = response.text.split(":", 1)[0]
+                raise SmsServiceError(response.text)
 
         return response
 
@@ -39,8 +98,7 @@ class SmshubClient(BaseClient):
             params['country'] = country
         if operator:
             params['operator'] = operator
-        response = await self._request("GET", self.BASE_API_URL, params=params)
-        return response.json()
+        return await self._cached_json("getNumbersStatus", "GET", self.BASE_API_URL, params)
 
     async def request_number(
             self,
@@ -124,9 +182,7 @@ class SmshubClient(BaseClient):
             'act': 'manageActivations',
             'asc': 'getListOfCountriesAndOperators'
         }
-        response = await self._request("POST", self.UNOFFICIAL_API_URL, params=params)
-
-        return response.json()
+        return await self._cached_json("getListOfCountriesAndOperators", "POST", self.UNOFFICIAL_API_URL, params)
 
     async def wait_for_code(self, id: int, delay: int = 10, max_wait_time: int = 300) -> str:
         await self._set_status(id, 1)  # Сообщаю о том, что сообщение отправлено
@@ -150,8 +206,7 @@ class SmshubClient(BaseClient):
         params = {'action': 'getPrices', 'service': service}
         if country:
             params['country'] = country
-        response = await self._request("GET", self.BASE_API_URL, params=params)
-        return response.json()
+        return await self._cached_json("getPrices", "GET", self.BASE_API_URL, params)
 
     async def set_max_price(self, service: str, max_price: float, country: str) -> str:
         params = {
@@ -0,0 +1,194 @@
+import asyncio
+import time
+from collections import deque
+
+from curl_cffi import CurlError
+
+from .client import SmshubClient
+from .errors import SmsServiceError
+
+
+NumberKey = tuple[str, str | None, str | None]  # service, country, operator
+
+
+class _NumberStock:
+    def __init__(self):
+        self.numbers: deque[tuple[int, str, float]] = deque()  # id, number, acquired_at
+        self.condition = asyncio.Condition()
+        self.task: asyncio.Task | None = None
+        self.error: BaseException | None = None  # Почему остановилось пополнение
+
+
+class SmshubNumberPool:
+    """
+    Запас заранее купленных номеров для каждой пары сервис/страна(/оператор):
+        - Номер выдается сразу, без ожидания запроса к smshub и повторов при NO_NUMBERS.
+        - Запас пополняется в фоне до size номеров.
+        - Номера старше max_age отменяются (cancel_activation), чтобы не тратить баланс.
+    """
+
+    def __init__(
+            self,
+            client: SmshubClient,
+            *,
+            size: int = 2,
+            max_age: float = 15 * 60,
+            retry_delay: float = 5,
+            max_retry_delay: float = 60,
+            acquire_timeout: float = 60,
+    ):
+        """
+        :param size: Сколько номеров держать в запасе для каждой пары сервис/страна.
+        :param max_age: Через сколько секунд неиспользованный номер отменяется.
+         Активация на smshub живет 20 минут, поэтому значение должно быть меньше.
+        :param retry_delay: Пауза между повторами, если smshub вернул ошибку (например, NO_NUMBERS)
+         или запрос не прошел. Растет вдвое с каждой ошибкой подряд до max_retry_delay.
+        :param acquire_timeout: Сколько секунд acquire ждет номер, прежде чем вызвать SmsServiceError.
+        """
+        self.client = client
+        self.size = size
+        self.max_age = max_age
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.acquire_timeout = acquire_timeout
+        self._stocks: dict[NumberKey, _NumberStock] = {}
+        self._cancel_tasks: set[asyncio.Task] = set()
+        self._purchases: set[asyncio.Task] = set()  # Покупки, пережившие отмену пополнения
+
+    def _stock(self, key: NumberKey) -> _NumberStock:
+        stock = self._stocks.get(key)
+        if stock is None:
+            stock = self._stocks[key] = _NumberStock()
+        if stock.task is None or stock.task.done():
+            stock.error = None
+            stock.task = asyncio.create_task(self._maintain(key, stock))
+        return stock
+
+    def _cancel_later(self, id: int):
+        task = asyncio.create_task(self._cancel(id))
+        self._cancel_tasks.add(task)
+        task.add_done_callback(self._cancel_tasks.discard)
+
+    async def _cancel(self, id: int):
+        try:
+            await self.client.cancel_activation(id)
+        except SmsServiceError:
+            pass
+
+    def _cancel_purchased(self, purchase: asyncio.Task):
+        self._purchases.discard(purchase)
+        if not purchase.cancelled() and purchase.exception() is None:
+            id, _ = purchase.result()
+            self._cancel_later(id)
+
+    async def _purchase(self, key: NumberKey) -> tuple[int, str]:
+        # Отмена пополнения не прерывает покупку: иначе купленный номер не попадет ни в запас, ни в cancel_activation
+        purchase = asyncio.create_task(self.client.request_number(*key))
+        try:
+            return await asyncio.shield(purchase)
+        except asyncio.CancelledError:
+            self._purchases.add(purchase)
+            purchase.add_done_callback(self._cancel_purchased)
+            raise
+
+    def _drop_expired(self, stock: _NumberStock):
+        deadline = time.monotonic() - self.max_age
+        while stock.numbers and stock.numbers[0][2] <= deadline:
+            id, _, _ = stock.numbers.popleft()
+            self._cancel_later(id)
+
+    async def _maintain(self, key: NumberKey, stock: _NumberStock):
+        try:
+            await self._refill(key, stock)
+        except Exception as exc:
+            # Ждущие acquire не должны висеть, если пополнение остановилось.
+            # Следующий acquire перезапустит пополнение
+            async with stock.condition:
+                stock.error = exc
+                stock.condition.notify_all()
+
+    async def _refill(self, key: NumberKey, stock: _NumberStock):
+        failures = 0
+        while True:
+            async with stock.condition:
+                self._drop_expired(stock)
+                if len(stock.numbers) >= self.size:
+                    # Ждем, пока номер заберут или пока истечет самый старый
+                    timeout = stock.numbers[0][2] + self.max_age - time.monotonic()
+                    try:
+                        await asyncio.wait_for(
+                            stock.condition.wait_for(lambda: len(stock.numbers) < self.size), max(timeout, 0))
+                    except TimeoutError:
+                        pass
+                    continue
+
+            try:
+                id, number = await self._purchase(key)
+            except (SmsServiceError, CurlError):
+                await asyncio.sleep(min(self.retry_delay * 2 ** failures, self.max_retry_delay))
+                failures += 1
+                continue
+            failures = 0
+
+            async with stock.condition:
+                stock.numbers.append((id, number, time.monotonic()))
+                stock.condition.notify_all()
+
+    def prefetch(self, service: str, country: str = None, operator: str = None):
+        """
+        Начинает пополнять запас заранее, не дожидаясь первого acquire.
+        """
+        self._stock((service, country, operator))
+
+    async def acquire(
+            self,
+            service: str,
+            country: str = None,
+            operator: str = None,
+            *,
+            timeout: float = None,
+    ) -> tuple[int, str]:
+        """
+        Аналог SmshubClient.request_number, но номер берется из запаса.
+        :param timeout: Сколько секунд ждать номер. По умолчанию - acquire_timeout.
+        :return: id, number
+        """
+        key = (service, country, operator)
+        stock = self._stock(key)
+        try:
+            return await asyncio.wait_for(self._take(stock), timeout if timeout is not None else self.acquire_timeout)
+        except TimeoutError:
+            raise SmsServiceError(f"No numbers in pool for {key}")
+
+    async def _take(self, stock: _NumberStock) -> tuple[int, str]:
+        async with stock.condition:
+            while True:
+                self._drop_expired(stock)
+                if stock.numbers:
+                    id, number, _ = stock.numbers.popleft()
+                    stock.condition.notify_all()
+                    return id, number
+                if stock.error is not None:
+                    raise SmsServiceError(f"Number pool refill stopped: {stock.error!r}") from stock.error
+                await stock.condition.wait()
+
+    async def close(self):
+        """
+        Останавливает пополнение и отменяет все неиспользованные номера.
+        """
+        for stock in self._stocks.values():
+            if stock.task:
+                stock.task.cancel()
+            while stock.numbers:
+                id, _, _ = stock.numbers.popleft()
+                self._cancel_later(id)
+        await asyncio.gather(*(stock.task for stock in self._stocks.values() if stock.task), return_exceptions=True)
+        await asyncio.gather(*self._purchases, return_exceptions=True)
+        await asyncio.gather(*self._cancel_tasks, return_exceptions=True)
+        self._stocks.clear()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
@@ -0,0 +1,193 @@
+import asyncio
+import time
+from typing import Any
+
+from .client import SmshubClient
+from .errors import SmsServiceError
+
+
+def _parse_current_activations(data: Any) -> dict[int, str | None]:
+    """
+    Разбирает ответ getCurrentActivations в словарь {id: code | None}.
+    Список активаций ищется либо в самом ответе, либо в первом значении-списке словаря.
+    """
+    if isinstance(data, dict):
+        data = next((value for value in data.values() if isinstance(value, list)), [])
+    if not isinstance(data, list):
+        return {}
+
+    activations = {}
+    for activation in data:
+        if not isinstance(activation, dict):
+            continue
+        id = activation.get("activationId") or activation.get("id")
+        if id is None:
+            continue
+        code = activation.get("smsCode") or activation.get("code")
+        if isinstance(code, list):
+            code = code[-1] if code else None
+        activations[int(id)] = str(code) if code else None
+    return activations
+
+
+class SmshubCodePoller:
+    """
+    Общий опросчик статусов для множества одновременных активаций:
+        - Все ожидающие активации опрашиваются одним циклом.
+        - Статусы запрашиваются пачкой через getCurrentActivations (bulk=True);
+          активации без кода в пачке (в том числе пропавшие из нее или отмененные)
+          опрашиваются через getStatus не чаще раза в status_interval.
+        - Интервал опроса растет, пока коды не приходят, и сбрасывается, когда приходят.
+        - Новая активация опрашивается сразу, не сдвигая расписание остальных.
+    """
+
+    def __init__(
+            self,
+            client: SmshubClient,
+            *,
+            min_interval: float = 2,
+            max_interval: float = 15,
+            backoff: float = 1.5,
+            bulk: bool = True,
+            status_interval: float = 10,
+            max_concurrent_requests: int = 5,
+    ):
+        """
+        :param status_interval: Не чаще скольких секунд опрашивать одну активацию через getStatus при bulk=True.
+        """
+        self.client = client
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.bulk = bulk
+        self.status_interval = status_interval
+        self.interval = min_interval
+        self._semaphore = asyncio.Semaphore(max_concurrent_requests)
+        self._waiters: dict[int, asyncio.Future] = {}
+        self._next_poll_at: dict[int, float] = {}
+        self._status_requested_at: dict[int, float] = {}
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def pending(self) -> int:
+        return len(self._waiters)
+
+    async def _request_status(self, id: int) -> str:
+        async with self._semaphore:
+            return await self.client.request_status(id)
+
+    async def _fetch_codes(self, ids: list[int]) -> dict[int, str | None]:
+        codes = {}
+        if self.bulk:
+            try:
+                activations = _parse_current_activations(await self.client.request_current_activations())
+                codes = {id: activations[id] for id in ids if activations.get(id)}
+            except Exception:
+                pass
+
+        now = time.monotonic()
+        missing_ids = [
+            id for id in ids
+            if id not in codes and (not self.bulk or now - self._status_requested_at.get(id, -self.status_interval)
+                                    >= self.status_interval)
+        ]
+        for id in missing_ids:
+            self._status_requested_at[id] = now
+        statuses = await asyncio.gather(*(self._request_status(id) for id in missing_ids), return_exceptions=True)
+        for id, status in zip(missing_ids, statuses):
+            if isinstance(status, SmsServiceError):
+                self._reject(id, status)
+            elif isinstance(status, Exception):
+                # Сетевые ошибки не фатальны: активация будет опрошена в следующий раз
+                continue
+            elif status.startswith("STATUS_OK"):
+                _, codes[id] = status.split(":", 1)
+            elif status.startswith("STATUS_CANCEL"):
+                self._reject(id, SmsServiceError(status))
+        return codes
+
+    def _forget(self, id: int):
+        self._next_poll_at.pop(id, None)
+        self._status_requested_at.pop(id, None)
+
+    def _reject(self, id: int, exception: Exception):
+        self._forget(id)
+        future = self._waiters.pop(id, None)
+        if future and not future.done():
+            future.set_exception(exception)
+
+    async def _confirm(self, id: int):
+        try:
+            await self.client.confirm_activation(id)  # Подтверждаю получение кода
+        except SmsServiceError:
+            pass
+
+    async def _poll(self):
+        while self._waiters:
+            now = time.monotonic()
+            due_ids = [id for id in self._waiters if self._next_poll_at.get(id, 0) <= now]
+            if due_ids:
+                codes = await self._fetch_codes(due_ids)
+                received = False
+                for id, code in codes.items():
+                    future = self._waiters.get(id)
+                    if not code or not future:
+                        continue
+                    received = True
+                    del self._waiters[id]
+                    self._forget(id)
+                    if not future.done():
+                        future.set_result(code)
+                    asyncio.create_task(self._confirm(id))
+
+                if received:
+                    self.interval = self.min_interval
+                else:
+                    self.interval = min(self.interval * self.backoff, self.max_interval)
+
+                next_poll_at = time.monotonic() + self.interval
+                for id in due_ids:
+                    if id in self._waiters:
+                        self._next_poll_at[id] = next_poll_at
+
+            if not self._waiters:
+                break
+            # Новая активация без next_poll_at будит цикл и опрашивается сразу
+            delay = min(self._next_poll_at.get(id, 0) for id in self._waiters) - time.monotonic()
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), max(delay, 0))
+            except TimeoutError:
+                pass
+
+    def _ensure_polling(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._poll())
+
+    async def wait_for_code(self, id: int, max_wait_time: int = 300) -> str:
+        """
+        Аналог SmshubClient.wait_for_code, но без собственного цикла опроса.
+        """
+        await self.client._set_status(id, 1)  # Сообщаю о том, что сообщение отправлено
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[id] = future
+        self._wakeup.set()
+        self._ensure_polling()
+        try:
+            return await asyncio.wait_for(future, max_wait_time)
+        except TimeoutError:
+            raise TimeoutError("Max wait time exceeded")
+        finally:
+            if self._waiters.get(id) is future:
+                del self._waiters[id]
+                self._forget(id)
+
+    def close(self):
+        if self._task:
+            self._task.cancel()
+        for future in self._waiters.values():
+            future.cancel()
+        self._waiters.clear()
+        self._next_poll_at.clear()
+        self._status_requested_at.clear()
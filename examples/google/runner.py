@@ -0,0 +1,41 @@
+import asyncio
+from better_automation.playwright_ import PlaywrightBrowserPool
+from better_automation.google import GoogleAccountsRunner
+from better_automation.google.account import from_file
+from better_automation.proxies import ProxyManager
+from better_proxy import Proxy
+
+OAUTH2_DATA = {
+    'client_id': '968583257586-kljtp79kj8nc53gocd7lmo3sfgbd2i1f.apps.googleusercontent.com',
+    'prompt': 'consent',
+    'redirect_uri': 'https://airdrop.gomble.io/login',
+    'scope': 'https://www.googleapis.com/auth/userinfo.email',
+}
+
+
+async def main():
+    google_accounts = from_file("google_accounts.txt", separator=":")
+    # Не более 2 контекстов на прокси, прокси с 3 ошибками подряд уходит в карантин
+    proxies = ProxyManager(Proxy.from_file("proxies.txt"), max_uses=2)
+    await proxies.preflight()
+
+    # По одному процессу браузера на ядро, каждый перезапускается после 200 контекстов
+    async with PlaywrightBrowserPool(max_contexts_per_browser=200) as browser:
+        # Одновременно открыто не более 20 контекстов, каждый получает самый быстрый из исправных прокси
+        runner = GoogleAccountsRunner(browser, concurrency=20, smshub_api_key='...')
+
+        async def oauth2(google):
+            return await google.oauth2(**OAUTH2_DATA)
+
+        async for result in runner.iter_run(google_accounts, oauth2, proxies=proxies):
+            if result.ok:
+                oauth_code, redirect_url = result.result
+                print(f"[{result.account}] {oauth_code}")
+            else:
+                print(f"[{result.account}] {result.account.status}: {result.exception}")
+
+        print(runner.stats)
+        for score in proxies.healthy():
+            print(score)
+
+asyncio.run(main())
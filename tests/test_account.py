@@ -0,0 +1,23 @@
+from better_automation.google.account import CompactGoogleAccount, GoogleAccount, GoogleAccountStatus
+
+COOKIES = [{"name": "SID", "value": "1", "domain": ".google.com"}]
+
+
+def test_compact_account_round_trip():
+    account = GoogleAccount(
+        email="user@gmail.com",
+        password="password",
+        cookies=COOKIES,
+        storage_state={"cookies": COOKIES, "origins": []},
+        status=GoogleAccountStatus.GOOD,
+    )
+    assert CompactGoogleAccount.from_account(account).to_account() == account
+
+
+def test_compact_account_returns_fresh_values():
+    account = CompactGoogleAccount("user@gmail.com", "password", cookies=COOKIES)
+    account.cookies.clear()
+    assert account.cookies == COOKIES
+
+    account.cookies = None
+    assert account.cookies is None
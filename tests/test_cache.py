@@ -0,0 +1,93 @@
+import asyncio
+import time
+
+from better_automation.smshub.cache import TTLCache
+
+
+def test_concurrent_fetches_are_coalesced():
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"calls": calls}
+
+    async def main():
+        cache = TTLCache()
+        results = await asyncio.gather(*(cache.get_or_fetch("key", fetch, 60) for _ in range(10)))
+        results.append(await cache.get_or_fetch("key", fetch, 60))
+        return cache, results
+
+    cache, results = asyncio.run(main())
+    assert calls == 1
+    assert results == [{"calls": 1}] * 11
+    assert (cache.misses, cache.hits) == (1, 10)
+
+
+def test_zero_ttl_is_not_cached():
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        return calls
+
+    async def main():
+        cache = TTLCache()
+        return [await cache.get_or_fetch("key", fetch, 0) for _ in range(3)]
+
+    assert asyncio.run(main()) == [1, 2, 3]
+
+
+def test_failed_fetch_is_not_cached():
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise ConnectionError
+        return "value"
+
+    async def main():
+        cache = TTLCache()
+        try:
+            await cache.get_or_fetch("key", fetch, 60)
+        except ConnectionError:
+            pass
+        return await cache.get_or_fetch("key", fetch, 60)
+
+    assert asyncio.run(main()) == "value"
+
+
+def test_callers_get_independent_copies():
+    async def fetch():
+        await asyncio.sleep(0.01)
+        return {"go": {"count": 1}}
+
+    async def main():
+        cache = TTLCache()
+        first, second = await asyncio.gather(
+            cache.get_or_fetch("key", fetch, 60), cache.get_or_fetch("key", fetch, 60))
+        first["go"]["count"] = 0
+        second.clear()
+        return await cache.get_or_fetch("key", fetch, 60)
+
+    assert asyncio.run(main()) == {"go": {"count": 1}}
+
+
+def test_expired_entries_are_dropped(monkeypatch):
+    cache = TTLCache()
+    cache.set("key", "value", 10)
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 11)
+    assert cache.get("key") is None
+
+
+def test_persists_between_instances(tmp_path):
+    filepath = tmp_path / "cache.json"
+    cache = TTLCache(filepath)
+    cache.set("key", [1, 2], 60)
+    cache.flush()
+    assert TTLCache(filepath).get("key") == [1, 2]
@@ -0,0 +1,131 @@
+import asyncio
+
+import pytest
+
+from better_automation.captcha import CaptchaQueue, CaptchaTask, FakeCaptchaSolver
+from better_automation.captcha.base import CaptchaSolver
+from better_automation.captcha.errors import CaptchaSolvingError
+from better_automation.google.account import GoogleAccount, GoogleAccountStatus
+from better_automation.google.browser import GooglePlaywrightBrowserContext
+from better_automation.google.errors import CaptchaRequired
+
+TASK = CaptchaTask(sitekey="sitekey", page_url="https://accounts.google.com/")
+
+
+class BrokenSolver(CaptchaSolver):
+    async def solve(self, task: CaptchaTask) -> str:
+        raise ConnectionResetError("connection reset by peer")
+
+
+async def solve(solver: CaptchaSolver, timeout: float = None, *, concurrency: int = 20) -> str:
+    async with CaptchaQueue(solver, concurrency=concurrency) as queue:
+        return await queue.solve(TASK, timeout)
+
+
+def test_queue_returns_token():
+    solver = FakeCaptchaSolver(delay=0.01, jitter=0)
+    assert asyncio.run(solve(solver)) == "fake-token-1-sitekey"
+    assert solver.tasks == [TASK]
+
+
+def test_queue_timeout():
+    with pytest.raises(TimeoutError):
+        asyncio.run(solve(FakeCaptchaSolver(delay=1, jitter=0), timeout=0.01))
+
+
+def test_queue_solver_failure():
+    with pytest.raises(CaptchaSolvingError):
+        asyncio.run(solve(FakeCaptchaSolver(delay=0, error_rate=1)))
+
+
+def test_queue_wraps_backend_errors():
+    with pytest.raises(CaptchaSolvingError) as exc_info:
+        asyncio.run(solve(BrokenSolver()))
+    assert isinstance(exc_info.value.__cause__, ConnectionResetError)
+
+
+def test_queue_skips_abandoned_tasks():
+    async def main():
+        solver = FakeCaptchaSolver(delay=0.05, jitter=0)
+        async with CaptchaQueue(solver, concurrency=1) as queue:
+            first = queue.submit(TASK)
+            second = queue.submit(TASK)
+            second.cancel()
+            await first
+            await asyncio.sleep(0)
+            return solver, queue.stats
+
+    solver, stats = asyncio.run(main())
+    assert len(solver.tasks) == 1
+    assert stats["solved"] == 1 and stats["cancelled"] == 1
+
+
+class StubLocator:
+    def __init__(self, page: "StubPage"):
+        self._page = page
+
+    async def get_attribute(self, name: str) -> str:
+        return "https://www.google.com/recaptcha/api2/anchor?k=sitekey&size=normal"
+
+    async def click(self):
+        self._page.clicked = True
+
+
+class StubPage:
+    url = "https://accounts.google.com/"
+
+    def __init__(self):
+        self.token = None
+        self.clicked = False
+
+    def locator(self, xpath: str) -> StubLocator:
+        return StubLocator(self)
+
+    async def evaluate(self, script: str, token: str):
+        self.token = token
+
+
+def solve_on_page(solver: CaptchaSolver, time_to_solve_captcha: int = 30_000) -> tuple[StubPage, GoogleAccount]:
+    async def main():
+        async with CaptchaQueue(solver) as queue:
+            account = GoogleAccount(email="user@gmail.com", password="password")
+            google = GooglePlaywrightBrowserContext(
+                object(), account, captcha_queue=queue, time_to_solve_captcha=time_to_solve_captcha)
+            page = StubPage()
+            try:
+                await google._solve_captcha(page)
+            finally:
+                assert account.status == GoogleAccountStatus.CAPTCHA_REQUIRED
+            return page
+
+    return asyncio.run(main())
+
+
+def test_login_injects_token():
+    page = solve_on_page(FakeCaptchaSolver(delay=0, jitter=0))
+    assert page.token == "fake-token-1-sitekey"
+    assert page.clicked
+
+
+@pytest.mark.parametrize("solver, time_to_solve_captcha", [
+    (FakeCaptchaSolver(delay=1, jitter=0), 10),
+    (FakeCaptchaSolver(delay=0, error_rate=1), 30_000),
+    (BrokenSolver(), 30_000),
+])
+def test_login_raises_captcha_required(solver, time_to_solve_captcha):
+    with pytest.raises(CaptchaRequired) as exc_info:
+        solve_on_page(solver, time_to_solve_captcha)
+    assert exc_info.value.__cause__ is None
+
+
+def test_capsolver_wraps_transport_errors(monkeypatch):
+    recaptcha = pytest.importorskip("python3_capsolver.recaptcha")
+    from better_automation.captcha import CapsolverSolver
+
+    async def aio_captcha_handler(self):
+        raise ConnectionResetError("connection reset by peer")
+
+    monkeypatch.setattr(recaptcha.ReCaptcha, "aio_captcha_handler", aio_captcha_handler)
+    with pytest.raises(CaptchaSolvingError) as exc_info:
+        asyncio.run(CapsolverSolver("api-key").solve(TASK))
+    assert isinstance(exc_info.value.__cause__, ConnectionResetError)
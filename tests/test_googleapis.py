@@ -0,0 +1,46 @@
+import asyncio
+
+from better_automation.googleapis import GoogleAPIsClient
+from better_automation.googleapis.errors import CircuitOpen, GoogleAPIsServerError, TooManyRequests
+
+
+class StubResponse:
+    def __init__(self, status_code: int):
+        self.status_code = status_code
+        self.headers = {}
+        self.text = ""
+
+
+def failing_client(monkeypatch, error: type, *, failure_threshold: int = 2) -> GoogleAPIsClient:
+    client = GoogleAPIsClient("key", max_retries=0, failure_threshold=failure_threshold, circuit_breakers={})
+
+    async def request_once(method, url, **kwargs):
+        status_code = 429 if error is TooManyRequests else 503
+        raise error(StubResponse(status_code), {"error": {"message": "error", "errors": []}})
+
+    monkeypatch.setattr(client, "_request_once", request_once)
+    return client
+
+
+def request_times(client: GoogleAPIsClient, times: int) -> list[type]:
+    async def main():
+        errors = []
+        for _ in range(times):
+            try:
+                await client.request("POST", GoogleAPIsClient.SECURE_TOKEN_URL)
+            except Exception as exc:
+                errors.append(type(exc))
+        return errors
+
+    return asyncio.run(main())
+
+
+def test_server_errors_open_circuit(monkeypatch):
+    client = failing_client(monkeypatch, GoogleAPIsServerError)
+    assert request_times(client, 3) == [GoogleAPIsServerError, GoogleAPIsServerError, CircuitOpen]
+
+
+def test_throttling_does_not_open_circuit(monkeypatch):
+    client = failing_client(monkeypatch, TooManyRequests)
+    assert request_times(client, 5) == [TooManyRequests] * 5
+    assert client._circuit_breaker(GoogleAPIsClient.SECURE_TOKEN_URL).state == "closed"
@@ -0,0 +1,128 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from better_automation.google import runner as runner_module
+from better_automation.google.account import GoogleAccount, GoogleAccountStatus
+from better_automation.google.journal import GoogleAccountsJournal
+from better_automation.google.runner import GoogleAccountsRunner
+
+
+class StubBrowser:
+    @asynccontextmanager
+    async def new_context(self, **kwargs):
+        yield object()
+
+
+class StubGoogle:
+    def __init__(self, context, account, *, journal=None, **kwargs):
+        self.account = account
+        self.journal = journal
+
+    async def login(self):
+        # Как GooglePlaywrightBrowserContext.login: cookies журналируются сразу после входа
+        self.account.status = GoogleAccountStatus.GOOD
+        self.account.cookies = [{"name": "SID", "value": "1"}]
+        self.journal.record(self.account, cookies=self.account.cookies)
+
+
+@pytest.fixture
+def stub_google(monkeypatch):
+    monkeypatch.setattr(runner_module, "GooglePlaywrightBrowserContext", StubGoogle)
+
+
+def make_account(email: str = "user@gmail.com") -> GoogleAccount:
+    return GoogleAccount(email=email, password="password")
+
+
+def run(journal: GoogleAccountsJournal, accounts, action):
+    runner = GoogleAccountsRunner(StubBrowser(), concurrency=1, journal=journal)
+    return asyncio.run(runner.run(accounts, action))
+
+
+async def login_then_fail(google):
+    await google.login()
+    raise RuntimeError("oauth2 failed")
+
+
+async def login_then_oauth2(google):
+    await google.login()
+    return "code"
+
+
+def test_resume_after_failure_between_login_and_oauth2(tmp_path, stub_google):
+    filepath = tmp_path / "journal.tsv"
+
+    with GoogleAccountsJournal(filepath) as journal:
+        [result] = run(journal, [make_account()], login_then_fail)
+        assert not result.ok
+        assert journal.status("user@gmail.com") == GoogleAccountStatus.GOOD
+        assert not journal.is_done("user@gmail.com")
+
+    with GoogleAccountsJournal(filepath) as journal:
+        # GOOD после login - промежуточный статус, действие нужно повторить
+        [account] = journal.pending([make_account()])
+        assert account.status == GoogleAccountStatus.GOOD
+
+        [result] = run(journal, [account], login_then_oauth2)
+        assert result.ok
+        assert journal.artifacts("user@gmail.com") == {"result": "code"}
+
+    with GoogleAccountsJournal(filepath) as journal:
+        assert journal.is_done("user@gmail.com")
+        assert list(journal.pending([make_account()])) == []
+
+
+def test_resume_after_crash_between_login_and_oauth2(tmp_path):
+    filepath = tmp_path / "journal.tsv"
+    account = make_account()
+
+    with GoogleAccountsJournal(filepath) as journal:
+        account.status = GoogleAccountStatus.GOOD
+        journal.record(account, cookies=[])
+
+    with GoogleAccountsJournal(filepath) as journal:
+        assert [account.email for account in journal.pending([make_account()])] == ["user@gmail.com"]
+
+
+def test_pending_skips_hopeless_statuses(tmp_path):
+    filepath = tmp_path / "journal.tsv"
+    banned = make_account("banned@gmail.com")
+    banned.status = GoogleAccountStatus.BANNED
+    captcha = make_account("captcha@gmail.com")
+    captcha.status = GoogleAccountStatus.CAPTCHA_REQUIRED
+
+    with GoogleAccountsJournal(filepath) as journal:
+        journal.record(banned)
+        journal.record(captcha)
+
+    with GoogleAccountsJournal(filepath) as journal:
+        pending = journal.pending([make_account("banned@gmail.com"), make_account("captcha@gmail.com")])
+        assert [account.email for account in pending] == ["captcha@gmail.com"]
+
+
+def test_torn_tail_is_truncated(tmp_path):
+    filepath = tmp_path / "journal.tsv"
+    account = make_account()
+
+    with GoogleAccountsJournal(filepath) as journal:
+        account.status = GoogleAccountStatus.CAPTCHA_REQUIRED
+        journal.record(account, error="CaptchaRequired")
+    intact_size = filepath.stat().st_size
+    with open(filepath, "ab") as file:
+        # Процесс упал посреди записи
+        file.write(b"user@gmail.com\tGOOD\t1\t17000")
+
+    with GoogleAccountsJournal(filepath) as journal:
+        assert filepath.stat().st_size == intact_size
+        assert journal.status("user@gmail.com") == GoogleAccountStatus.CAPTCHA_REQUIRED
+        assert not journal.is_done("user@gmail.com")
+
+        account.status = GoogleAccountStatus.GOOD
+        journal.finish(account, result="code")
+
+    with GoogleAccountsJournal(filepath) as journal:
+        assert journal.is_done("user@gmail.com")
+        assert journal.artifacts("user@gmail.com") == {"result": "code"}
+        assert len(journal) == 1
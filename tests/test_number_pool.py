@@ -0,0 +1,46 @@
+import asyncio
+
+from better_automation.smshub import SmshubNumberPool
+
+
+class StubClient:
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.purchased: list[int] = []
+        self.cancelled: list[int] = []
+
+    async def request_number(self, service, country=None, operator=None) -> tuple[int, str]:
+        await asyncio.sleep(self.delay)
+        id = len(self.purchased) + 1
+        self.purchased.append(id)
+        return id, f"7900000000{id}"
+
+    async def cancel_activation(self, id: int):
+        self.cancelled.append(id)
+
+
+def test_close_cancels_number_bought_during_shutdown():
+    async def main():
+        client = StubClient(delay=0.05)
+        pool = SmshubNumberPool(client, size=1)
+        pool.prefetch("go", "0")
+        await asyncio.sleep(0.01)  # Покупка в процессе
+        await pool.close()
+        return client
+
+    client = asyncio.run(main())
+    assert client.purchased == [1]
+    assert client.cancelled == [1]
+
+
+def test_close_cancels_unused_numbers():
+    async def main():
+        client = StubClient(delay=0)
+        async with SmshubNumberPool(client, size=2) as pool:
+            id, _ = await pool.acquire("go", "0")
+            await asyncio.sleep(0.01)
+        return id, client
+
+    id, client = asyncio.run(main())
+    assert id not in client.cancelled
+    assert sorted(client.cancelled + [id]) == client.purchased
@@ -0,0 +1,69 @@
+import asyncio
+import time
+
+from better_automation.rate_limit import RateLimiter, TokenBucket
+
+
+def elapsed(coroutine) -> float:
+    start_time = time.monotonic()
+    asyncio.run(coroutine)
+    return time.monotonic() - start_time
+
+
+def test_token_bucket_allows_burst_then_rate():
+    async def main():
+        bucket = TokenBucket(rate=50, burst=5)
+        for _ in range(5):
+            await bucket.acquire()
+        burst_elapsed = time.monotonic() - start_time
+        for _ in range(10):
+            await bucket.acquire()
+        return burst_elapsed
+
+    start_time = time.monotonic()
+    burst_elapsed = asyncio.run(main())
+    total_elapsed = time.monotonic() - start_time
+    assert burst_elapsed < 0.05
+    # 10 запросов сверх всплеска при 50 в секунду - около 0.2 секунды
+    assert 0.15 < total_elapsed < 0.5
+
+
+def test_token_bucket_serves_concurrent_waiters():
+    async def main():
+        bucket = TokenBucket(rate=100, burst=1)
+        await asyncio.gather(*(bucket.acquire() for _ in range(21)))
+
+    assert 0.15 < elapsed(main()) < 0.5
+
+
+def test_rate_limiter_buckets_per_key():
+    async def main():
+        limiter = RateLimiter(20, burst=1)
+        await asyncio.gather(*(limiter.acquire(key) for key in range(20)))
+
+    # У каждого ключа свой всплеск, поэтому ждать не приходится
+    assert elapsed(main()) < 0.05
+
+
+def test_rate_limiter_per_endpoint():
+    limiter = RateLimiter(10, per_endpoint=True)
+    assert limiter.bucket("key", "a") is not limiter.bucket("key", "b")
+    limiter = RateLimiter(10)
+    assert limiter.bucket("key", "a") is limiter.bucket("key", "b")
+
+
+def test_adaptive_rate():
+    limiter = RateLimiter(10, adaptive=True, min_rate=2)
+    bucket = limiter.bucket("key")
+    for _ in range(5):
+        limiter.on_throttled("key")
+    assert bucket.rate == 2
+    for _ in range(100):
+        limiter.on_success("key")
+    assert bucket.rate == 10
+
+
+def test_non_adaptive_rate_is_fixed():
+    limiter = RateLimiter(10)
+    limiter.on_throttled("key")
+    assert limiter.bucket("key").rate == 10
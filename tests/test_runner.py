@@ -0,0 +1,61 @@
+import pytest
+from playwright.async_api import Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+
+from better_automation.captcha.errors import CaptchaSolvingError
+from better_automation.google.errors import CaptchaRequired, FailedToLogin, FailedToOAuth2
+from better_automation.google.runner import is_proxy_error
+
+
+def raised(inner: BaseException, outer: BaseException, *, explicit: bool) -> BaseException:
+    try:
+        try:
+            raise inner
+        except type(inner) as exc:
+            if explicit:
+                raise outer from exc
+            raise outer
+    except type(outer) as exc:
+        return exc
+
+
+@pytest.mark.parametrize("exception", [
+    PlaywrightTimeoutError("Timeout 30000ms exceeded."),
+    PlaywrightError("page.goto: NS_ERROR_PROXY_CONNECTION_REFUSED"),
+    PlaywrightError("page.goto: NS_ERROR_NET_TIMEOUT"),
+    PlaywrightError("page.goto: net::ERR_TUNNEL_CONNECTION_FAILED at https://accounts.google.com"),
+    ConnectionResetError(),
+    TimeoutError(),
+])
+def test_network_errors_are_proxy_errors(exception):
+    assert is_proxy_error(exception)
+
+
+@pytest.mark.parametrize("exception", [
+    None,
+    ValueError(),
+    PlaywrightError("Target page, context or browser has been closed"),
+    FailedToLogin("Failed to login Google account: failed to catch auth cookies."),
+    FailedToOAuth2("Failed to OAuth2 Google account: Failed to catch oauth code."),
+    CaptchaRequired("Failed to login Google account: captcha required."),
+])
+def test_account_outcomes_are_not_proxy_errors(exception):
+    assert not is_proxy_error(exception)
+
+
+def test_explicit_timeout_cause_is_proxy_error():
+    exception = raised(
+        PlaywrightTimeoutError("Timeout 30000ms exceeded."),
+        FailedToLogin("Failed to login Google account: unexpected TimeoutError."),
+        explicit=True,
+    )
+    assert is_proxy_error(exception)
+
+
+@pytest.mark.parametrize("inner, outer", [
+    (PlaywrightTimeoutError("Timeout 30000ms exceeded."),
+     FailedToLogin("Failed to login Google account: stuck on CHALLENGE page.")),
+    (TimeoutError(), CaptchaRequired("Failed to login Google account: captcha required.")),
+    (CaptchaSolvingError("ERROR_CAPTCHA_UNSOLVABLE"), CaptchaRequired("captcha required.")),
+])
+def test_implicit_context_is_ignored(inner, outer):
+    assert not is_proxy_error(raised(inner, outer, explicit=False))